@@ -0,0 +1,27 @@
+"""индексы для ключевой пагинации
+
+Revision ID: 5d2c1a7e9f30
+Revises: bb19d2ee9ba4
+Create Date: 2026-10-18 10:12:40.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c1a7e9f30'
+down_revision: Union[str, None] = 'bb19d2ee9ba4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
@@ -0,0 +1,39 @@
+"""счетчики лайков и избранного в posts
+
+Revision ID: 8a41f0c3b6d2
+Revises: 5d2c1a7e9f30
+Create Date: 2026-10-18 12:40:03.551907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41f0c3b6d2'
+down_revision: Union[str, None] = '5d2c1a7e9f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('likes_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('favorites_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_likes_post_id'), 'likes', ['post_id'], unique=False)
+    op.create_index('ix_favorites_post_id', 'favorites', ['post_id'], unique=False)
+
+    # Заполняем счетчики по текущим данным
+    op.execute(
+        "UPDATE posts SET "
+        "likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = posts.id), "
+        "favorites_count = (SELECT count(*) FROM favorites WHERE favorites.post_id = posts.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_favorites_post_id', table_name='favorites')
+    op.drop_index(op.f('ix_likes_post_id'), table_name='likes')
+    op.drop_column('posts', 'favorites_count')
+    op.drop_column('posts', 'likes_count')
@@ -0,0 +1,35 @@
+"""полнотекстовый поиск по постам
+
+Revision ID: c7e5d9a2f1b4
+Revises: 8a41f0c3b6d2
+Create Date: 2026-10-18 15:02:47.730215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e5d9a2f1b4'
+down_revision: Union[str, None] = '8a41f0c3b6d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # В SQLite поиск идет по индексу в памяти приложения
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Выражение должно совпадать с app.database.models.post_search_vector
+    op.execute(
+        "CREATE INDEX ix_posts_search ON posts USING gin (("
+        "setweight(to_tsvector('russian'::regconfig, title), 'A') || "
+        "setweight(to_tsvector('russian'::regconfig, content), 'B')))"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_posts_search', table_name='posts')
@@ -0,0 +1,47 @@
+"""ON DELETE CASCADE для ссылок на посты и пользователей
+
+Revision ID: d3f8b6a1e5c7
+Revises: c7e5d9a2f1b4
+Create Date: 2026-10-18 17:21:09.418532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8b6a1e5c7'
+down_revision: Union[str, None] = 'c7e5d9a2f1b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, колонка, на какую таблицу ссылается); имена ограничений - как их назвал Postgres
+FOREIGN_KEYS = [
+    ('likes', 'post_id', 'posts'),
+    ('likes', 'user_id', 'users'),
+    ('favorites', 'post_id', 'posts'),
+    ('favorites', 'user_id', 'users'),
+    ('comments', 'post_id', 'posts'),
+    ('post_categories', 'post_id', 'posts'),
+]
+
+
+def _recreate(ondelete):
+    for table, column, referent in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    # В SQLite внешние ключи не меняются через ALTER, там схему создает create_all
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _recreate('CASCADE')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _recreate(None)
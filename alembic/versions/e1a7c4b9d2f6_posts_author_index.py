@@ -0,0 +1,25 @@
+"""индекс постов автора
+
+Revision ID: e1a7c4b9d2f6
+Revises: d3f8b6a1e5c7
+Create Date: 2026-10-18 19:02:51.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c4b9d2f6'
+down_revision: Union[str, None] = 'd3f8b6a1e5c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_author_id_created_at', 'posts', ['author_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_author_id_created_at', table_name='posts')
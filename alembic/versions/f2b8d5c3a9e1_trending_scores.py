@@ -0,0 +1,59 @@
+"""счета постов для ленты трендов
+
+Revision ID: f2b8d5c3a9e1
+Revises: e1a7c4b9d2f6
+Create Date: 2026-10-18 21:14:37.902811
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d5c3a9e1'
+down_revision: Union[str, None] = 'e1a7c4b9d2f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'post_scores',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+    )
+    op.create_index('ix_post_scores_score_post_id', 'post_scores', ['score', 'post_id'], unique=False)
+    op.create_table(
+        'trending_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('epoch', sa.DateTime(), nullable=False),
+        sa.Column('last_like_id', sa.Integer(), nullable=False),
+        sa.Column('last_favorite_at', sa.DateTime(), nullable=True),
+        sa.Column('last_favorite_user_id', sa.Integer(), nullable=True),
+        sa.Column('last_favorite_post_id', sa.Integer(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'scored_pairs',
+        sa.Column('kind', sa.String(length=8), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('kind', 'user_id', 'post_id')
+    )
+    op.create_index('ix_favorites_created_at', 'favorites', ['created_at', 'user_id', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_favorites_created_at', table_name='favorites')
+    op.drop_table('scored_pairs')
+    op.drop_table('trending_state')
+    op.drop_index('ix_post_scores_score_post_id', table_name='post_scores')
+    op.drop_table('post_scores')
@@ -0,0 +1,159 @@
+"""Общее для массовой загрузки данных: чтение JSON потоком, хеширование
+паролей в нескольких процессах и пакетная вставка с подсчетом строк в секунду."""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import Table, select, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.security import get_password_hash
+
+
+def iter_json_records(fp, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, object]]:
+    """Потоково читает JSON-объект вида {"users": [...], "posts": [...], ...}.
+
+    Отдает (ключ, элемент) для каждого элемента массивов верхнего уровня и
+    (ключ, значение) для остальных ключей, не загружая файл целиком.
+    """
+    decoder = json.JSONDecoder()
+    buf = fp.read(chunk_size)
+    pos = 0
+    eof = not buf
+
+    def skip(chars: str):
+        nonlocal buf, pos, eof
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            more()
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = fp.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def value():
+        # Значение принимаем, только если после него в буфере что-то есть:
+        # иначе число на границе чанка могло быть прочитано не целиком
+        nonlocal pos
+        while True:
+            try:
+                result, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    pos = end
+                    return result
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more()
+
+    def expect(char: str):
+        nonlocal pos
+        skip(" \t\r\n")
+        if pos >= len(buf) or buf[pos] != char:
+            raise ValueError(f"Ожидался '{char}' в позиции {pos}")
+        pos += 1
+
+    expect("{")
+    while True:
+        skip(" \t\r\n,")
+        if pos < len(buf) and buf[pos] == "}":
+            return
+        key = value()
+        expect(":")
+        skip(" \t\r\n")
+        if pos < len(buf) and buf[pos] == "[":
+            pos += 1
+            while True:
+                skip(" \t\r\n,")
+                if pos < len(buf) and buf[pos] == "]":
+                    pos += 1
+                    break
+                yield key, value()
+        else:
+            yield key, value()
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PasswordHasher:
+    """bcrypt в пуле процессов: хеширование упирается в CPU, а не в GIL"""
+
+    def __init__(self, workers: int = 0):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        chunksize = max(len(passwords) // (self.workers * 4), 1)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: list(self._pool.map(get_password_hash, passwords, chunksize=chunksize)))
+
+    def close(self):
+        self._pool.shutdown()
+
+
+class BulkLoader:
+    """Пакетная вставка: COPY в Postgres, executemany в остальных базах.
+
+    Каждая пачка - своя транзакция, так что загрузку можно прервать и
+    повторить с того места, где она остановилась.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.use_copy = engine.dialect.name == "postgresql"
+        self.rows: Dict[str, int] = {}
+        self.started = time.perf_counter()
+
+    async def write(self, table: Table, rows: List[dict]):
+        if not rows:
+            return
+        async with self.engine.begin() as conn:
+            if self.use_copy:
+                columns = list(rows[0])
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    table.name, records=[tuple(row[column] for column in columns) for row in rows], columns=columns
+                )
+            else:
+                await conn.execute(table.insert(), rows)
+        self.rows[table.name] = self.rows.get(table.name, 0) + len(rows)
+
+    async def next_id(self, table: Table) -> int:
+        async with self.engine.connect() as conn:
+            return (await conn.scalar(select(func.max(table.c.id))) or 0) + 1
+
+    async def reset_sequences(self, *tables: Table):
+        """После вставки с явными id двигаем последовательности Postgres"""
+        if not self.use_copy:
+            return
+        async with self.engine.begin() as conn:
+            for table in tables:
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table.name}))"
+                ))
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.rows.values())
+        lines = [f"  {name}: {count} строк" for name, count in self.rows.items()]
+        lines.append(f"Всего {total} строк за {elapsed:.1f} с, {total / elapsed if elapsed else 0:.0f} строк/с")
+        return "\n".join(lines)
@@ -0,0 +1,42 @@
+"""
+Выгрузка всех постов с автором и счетчиками в NDJSON или CSV (например,
+для ночного дампа). Строки читаются серверным курсором, память постоянна.
+
+Запуск:
+    python -m app.commands.export_posts --format csv --gzip -o posts.csv.gz
+    python -m app.commands.export_posts > posts.ndjson
+"""
+import argparse
+import asyncio
+import sys
+
+from app.database.database import engine
+from app.database.export import EXPORT_FORMATS, EXPORT_BATCH_SIZE, export_posts, gzip_chunks
+
+
+async def export(output, fmt: str, compress: bool, batch_size: int):
+    async with engine.connect() as conn:
+        chunks = export_posts(conn, fmt, batch_size)
+        if compress:
+            chunks = gzip_chunks(chunks)
+        async for chunk in chunks:
+            output.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выгрузка постов")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="сжимать на лету")
+    parser.add_argument("-o", "--output", help="файл (по умолчанию stdout)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="строк за одно чтение курсора")
+    args = parser.parse_args()
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            asyncio.run(export(output, args.format, args.gzip, args.batch_size))
+    else:
+        asyncio.run(export(sys.stdout.buffer, args.format, args.gzip, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Синтетические данные для нагрузочных тестов: пользователи, посты, лайки и
+избранное в любом количестве, со сразу согласованными счетчиками постов.
+
+Генерация идет потоком пачками, так что миллионы строк не держатся в памяти.
+
+Запуск:
+    python -m app.commands.generate_data --users 10000 --posts 1000000 --likes 5000000 --favorites 1000000
+"""
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.database import engine
+from app.database.models import User, Post, Like, favorites
+from app.commands.bulk import PasswordHasher, BulkLoader
+from app.core.security import get_password_hash
+
+WORDS = (
+    "селедка селедки селедкой сельдь сельди картошка картошкой лук луком свекла свеклой морковь "
+    "майонез масло уксус соль перец укроп зелень шуба шубой рецепт вкусная маринованная соленая "
+    "подавать нарезать почистить залить холодильник праздник стол бабушка классический быстрый"
+).split()
+PASSWORD = "password123"
+
+
+def sample_count(rnd: random.Random, average: float, limit: int) -> int:
+    """Случайное число от 0 до 2*average со средним average, не больше limit"""
+    return min(int(2 * average * rnd.random() + rnd.random()), limit)
+
+
+async def generate(engine: AsyncEngine, users: int, posts: int, likes: int, favorites_count: int,
+                   batch_size: int = 10000, workers: int = 0, hash_each: bool = False, seed: int = 42) -> BulkLoader:
+    rnd = random.Random(seed)
+    loader = BulkLoader(engine)
+    first_user = await loader.next_id(User.__table__)
+    first_post = await loader.next_id(Post.__table__)
+    now = datetime.utcnow()
+
+    hasher = PasswordHasher(workers) if hash_each else None
+    shared_hash = None if hash_each else get_password_hash(PASSWORD)
+    try:
+        for start in range(first_user, first_user + users, batch_size):
+            ids = range(start, min(start + batch_size, first_user + users))
+            if hasher:
+                hashes = await hasher.hash_many([f"{PASSWORD}{user_id}" for user_id in ids])
+            else:
+                hashes = [shared_hash] * len(ids)
+            await loader.write(User.__table__, [
+                {
+                    "id": user_id, "email": f"user{user_id}@example.com", "login": f"user{user_id}",
+                    "hashed_password": hashed, "is_active": True, "is_admin": False,
+                    "created_at": now, "updated_at": now,
+                }
+                for user_id, hashed in zip(ids, hashes)
+            ])
+    finally:
+        if hasher:
+            hasher.close()
+
+    user_ids = range(first_user, first_user + users)
+    likes_per_post = likes / posts if posts else 0
+    favorites_per_post = favorites_count / posts if posts else 0
+    for start in range(first_post, first_post + posts, batch_size):
+        post_rows, like_rows, favorite_rows = [], [], []
+        for post_id in range(start, min(start + batch_size, first_post + posts)):
+            # Уникальность пар (user, post) дает sample внутри одного поста
+            likers = rnd.sample(user_ids, sample_count(rnd, likes_per_post, users))
+            fans = rnd.sample(user_ids, sample_count(rnd, favorites_per_post, users))
+            created_at = now - timedelta(minutes=first_post + posts - post_id)
+            post_rows.append({
+                "id": post_id,
+                "author_id": rnd.choice(user_ids),
+                "title": " ".join(rnd.choices(WORDS, k=3)).capitalize(),
+                "content": " ".join(rnd.choices(WORDS, k=rnd.randint(20, 120))),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "likes_count": len(likers),
+                "favorites_count": len(fans),
+            })
+            like_rows += [{"user_id": user_id, "post_id": post_id, "created_at": created_at} for user_id in likers]
+            favorite_rows += [{"user_id": user_id, "post_id": post_id, "created_at": created_at} for user_id in fans]
+        await loader.write(Post.__table__, post_rows)
+        await loader.write(Like.__table__, like_rows)
+        await loader.write(favorites, favorite_rows)
+
+    await loader.reset_sequences(User.__table__, Post.__table__)
+    return loader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--likes", type=int, default=500000, help="примерное общее число лайков")
+    parser.add_argument("--favorites", type=int, default=100000, help="примерное общее число добавлений в избранное")
+    parser.add_argument("--batch-size", type=int, default=10000, help="пользователей/постов в одной пачке")
+    parser.add_argument("--hash-each", action="store_true",
+                        help=f"у каждого пользователя свой пароль ({PASSWORD}<id>), хеши считаются в процессах")
+    parser.add_argument("--workers", type=int, default=0, help="процессов для bcrypt")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.users < 1:
+        parser.error("нужен хотя бы один пользователь")
+    loader = asyncio.run(generate(
+        engine, args.users, args.posts, args.likes, args.favorites,
+        args.batch_size, args.workers, args.hash_each, args.seed
+    ))
+    print(loader.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Импорт пользователей и постов из JSON-выгрузки (blog_data.json).
+
+Файл читается потоком, пароли хешируются в нескольких процессах, строки
+вставляются пачками (COPY в Postgres). id из файла сохраняются.
+
+Запуск:
+    python -m app.commands.import_data blog_data.json [--batch-size 5000] [--workers 4] [--admin LOGIN]
+
+Администраторами становятся только записи с isAdmin: true и логины из --admin.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.database import engine
+from app.database.models import User, Post
+from app.commands.bulk import iter_json_records, batched, PasswordHasher, BulkLoader
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value) if value else datetime.utcnow()
+
+
+def user_row(record: dict, admins: Iterable[str] = ()) -> dict:
+    """camelCase из файла -> колонки users; password хешируется отдельно"""
+    return {
+        "id": record["id"],
+        "email": record["email"],
+        "login": record["login"],
+        "hashed_password": record["password"],
+        "is_active": record.get("isActive", True),
+        "is_admin": bool(record.get("isAdmin", False)) or record["login"] in admins,
+        "created_at": parse_datetime(record.get("createdAt")),
+        "updated_at": parse_datetime(record.get("updatedAt")),
+    }
+
+
+def post_row(record: dict) -> dict:
+    return {
+        "id": record["id"],
+        "author_id": record["authorId"],
+        "title": record["title"],
+        "content": record["content"],
+        "created_at": parse_datetime(record.get("createdAt")),
+        "updated_at": parse_datetime(record.get("updatedAt")),
+        "likes_count": 0,
+        "favorites_count": 0,
+    }
+
+
+async def import_file(path: str, engine: AsyncEngine, batch_size: int = 5000, workers: int = 0,
+                      admins: Iterable[str] = ()) -> BulkLoader:
+    """Пользователи должны идти в файле раньше постов (как в выгрузке)"""
+    loader = BulkLoader(engine)
+    hasher = PasswordHasher(workers)
+    tables = {"users": (User.__table__, partial(user_row, admins=set(admins))), "posts": (Post.__table__, post_row)}
+    try:
+        with open(path, encoding="utf-8") as fp:
+            sections = ((key, record) for key, record in iter_json_records(fp) if key in tables)
+            for batch in batched(sections, batch_size):
+                # Пачка может захватить конец users и начало posts
+                for key in tables:
+                    table, to_row = tables[key]
+                    rows = [to_row(record) for section, record in batch if section == key]
+                    if key == "users" and rows:
+                        hashes = await hasher.hash_many([row["hashed_password"] for row in rows])
+                        for row, hashed in zip(rows, hashes):
+                            row["hashed_password"] = hashed
+                    await loader.write(table, rows)
+        await loader.reset_sequences(User.__table__, Post.__table__)
+    finally:
+        hasher.close()
+    return loader
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт пользователей и постов из JSON")
+    parser.add_argument("path", nargs="?", default="blog_data.json", help="файл выгрузки")
+    parser.add_argument("--batch-size", type=int, default=5000, help="строк в одной пачке")
+    parser.add_argument("--workers", type=int, default=0, help="процессов для bcrypt (по умолчанию - по числу CPU)")
+    parser.add_argument("--admin", action="append", default=[], metavar="LOGIN",
+                        help="сделать пользователя администратором (можно несколько раз)")
+    args = parser.parse_args()
+
+    loader = asyncio.run(import_file(args.path, engine, args.batch_size, args.workers, args.admin))
+    print(loader.report())
+
+
+if __name__ == "__main__":
+    main()
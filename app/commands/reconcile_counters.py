@@ -0,0 +1,42 @@
+"""
+Сверка денормализованных счетчиков posts.likes_count / posts.favorites_count
+с таблицами likes и favorites.
+
+Запуск:
+    python -m app.commands.reconcile_counters [--batch-size 1000]
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.database import engine
+from app.database.models import Post
+from app.database.counters import reconcile_statement, id_batches
+
+
+async def reconcile(engine: AsyncEngine, batch_size: int = 1000) -> int:
+    """Чинит расхождения пачками по id, каждая пачка в своей транзакции"""
+    async with engine.connect() as conn:
+        max_id = await conn.scalar(select(func.max(Post.id))) or 0
+
+    repaired = 0
+    for first_id, last_id in id_batches(max_id, batch_size):
+        async with engine.begin() as conn:
+            result = await conn.execute(reconcile_statement(first_id, last_id))
+            repaired += result.rowcount
+    return repaired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка счетчиков лайков и избранного")
+    parser.add_argument("--batch-size", type=int, default=1000, help="постов в одной транзакции")
+    args = parser.parse_args()
+
+    repaired = asyncio.run(reconcile(engine, args.batch_size))
+    print(f"Исправлено постов: {repaired}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Пересчет трендов: учитывает лайки и избранное, появившиеся с прошлого запуска.
+Обычно это делает фоновая задача приложения (TRENDING_REFRESH_SECONDS), команда
+нужна для первого заполнения и когда фоновая задача выключена.
+
+Запуск:
+    python -m app.commands.refresh_trending [--batch-size 10000]
+"""
+import argparse
+import asyncio
+
+from app.database.database import engine
+from app.database.trending import refresh_scores, REFRESH_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет трендов")
+    parser.add_argument("--batch-size", type=int, default=REFRESH_BATCH_SIZE, help="событий в одной транзакции")
+    args = parser.parse_args()
+
+    processed = asyncio.run(refresh_scores(engine, batch_size=args.batch_size))
+    print(f"Учтено событий: {processed}")
+
+
+if __name__ == "__main__":
+    main()
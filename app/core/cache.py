@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from app.core.config import settings
+
+
+class TTLCache:
+    """LRU-кэш с временем жизни записей.
+
+    Записи можно пометить тегами (например "post:5") и сбросить все записи
+    тега разом - так запись инвалидирует ровно те страницы, где видны
+    измененные данные.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._items: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        # Растет при каждой инвалидации, см. set(version=...)
+        self.version = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._items.get(key)
+        if item is None or item[1] <= self.clock():
+            if item is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), version: Optional[int] = None,
+            ttl: Optional[float] = None):
+        """Кладет значение в кэш.
+
+        version - значение self.version на момент чтения данных из БД: если с тех
+        пор была инвалидация, значение могло устареть и не сохраняется.
+        ttl - собственное время жизни записи, если оно меньше общего.
+        """
+        if self.max_size <= 0 or (version is not None and version != self.version):
+            return
+        self._remove(key)
+        tags = tuple(tags)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._items[key] = (value, self.clock() + ttl, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._items) > self.max_size:
+            self._remove(next(iter(self._items)))
+            self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Удаляет все записи с любым из тегов, возвращает их количество"""
+        self.version += 1
+        removed = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                if key in self._items:
+                    self._remove(key)
+                    removed += 1
+        self.invalidations += removed
+        return removed
+
+    def clear(self):
+        self.version += 1
+        self._items.clear()
+        self._tags.clear()
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable):
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# Готовые HTML-страницы для анонимных запросов (/, /posts/{id}, /search)
+page_cache = TTLCache(settings.PAGE_CACHE_SIZE, settings.PAGE_CACHE_TTL)
+
+# Снимки пользователей по JWT-токену для get_current_user
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
@@ -0,0 +1,159 @@
+import time
+import zlib
+from typing import Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость, без нее только gzip
+    brotli = None
+
+# Что сжимаем: текст, JSON, NDJSON, JS/CSS, SVG
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+
+
+class CompressionStats:
+    """Сколько байт сжали и во что, сколько процессорного времени на это ушло"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.cpu_seconds = {}
+
+    def record(self, encoding: str, size_in: int, size_out: int, cpu: float):
+        self.bytes_in[encoding] = self.bytes_in.get(encoding, 0) + size_in
+        self.bytes_out[encoding] = self.bytes_out.get(encoding, 0) + size_out
+        self.cpu_seconds[encoding] = self.cpu_seconds.get(encoding, 0.0) + cpu
+
+    def render(self) -> str:
+        lines = []
+        for name, help_text, values in (
+            ("compression_input_bytes_total", "Bytes before compression.", self.bytes_in),
+            ("compression_output_bytes_total", "Bytes after compression.", self.bytes_out),
+            ("compression_cpu_seconds_total", "CPU time spent compressing.", self.cpu_seconds),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for encoding, value in sorted(values.items()):
+                lines.append(f'{name}{{encoding="{encoding}"}} {value:.6f}' if isinstance(value, float)
+                             else f'{name}{{encoding="{encoding}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+compression_stats = CompressionStats()
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """br, если клиент его принимает и модуль установлен, иначе gzip"""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class Compressor:
+    """Потоковый компрессор: куски отдаются сразу, без буферизации всего ответа"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        started = time.thread_time()
+        if self.encoding == "br":
+            out = self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        else:
+            out = self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        compression_stats.record(self.encoding, len(data), len(out), time.thread_time() - started)
+        return out
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    return Compressor(encoding).compress(data, final=True)
+
+
+class CompressionMiddleware:
+    """ASGI-middleware сжатия gzip/br по Accept-Encoding.
+
+    Не трогает ответы, у которых уже есть Content-Encoding (например, заранее
+    сжатые страницы из кэша), несжимаемые типы и тела меньше minimum_size.
+    Потоковые ответы сжимаются кусками по мере отдачи.
+    """
+
+    def __init__(self, app, minimum_size: int = settings.COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                response_headers = {name.lower(): value for name, value in start["headers"]}
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in response_headers or not is_compressible(content_type)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = Compressor(encoding)
+                new_headers = [(name, value) for name, value in start["headers"]
+                               if name.lower() not in (b"content-length", b"content-encoding")]
+                new_headers.append((b"content-encoding", encoding.encode("latin-1")))
+                new_headers.append((b"vary", b"Accept-Encoding"))
+                body = compressor.compress(body, final=not more_body)
+                if not more_body:
+                    new_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+                await send({**start, "headers": new_headers})
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            if compressor is not None:
+                body = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Слабый ETag по значениям, от которых зависит тело ответа"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_conditional(request: Request) -> bool:
+    """Клиент прислал валидаторы - есть смысл сначала сверить версию"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Правила RFC 9110: If-None-Match важнее If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # В заголовке точность до секунды
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+    return False
+
+
+def http_date(value: datetime) -> str:
+    """updated_at хранится в UTC без зоны"""
+    return format_datetime(value.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime], vary: Optional[str] = None) -> dict:
+    # no-cache: клиент может хранить ответ, но перед использованием сверяет версию
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime], vary: Optional[str] = None):
+    response.headers.update(validator_headers(etag, last_modified, vary))
+
+
+def not_modified(etag: str, last_modified: Optional[datetime], vary: Optional[str] = None) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified, vary))
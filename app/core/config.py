@@ -8,5 +8,44 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-super-secret-key-for-seledka-blog-2024-change-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
+    # Пул соединений: постоянные + временные сверх них на каждый процесс воркера.
+    # Сумма по всем воркерам должна помещаться в max_connections базы
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    # Сколько секунд ждать свободное соединение, прежде чем отдать ошибку
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    # Пересоздавать соединения старше стольких секунд (-1 - никогда)
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Проверять соединение перед выдачей, чтобы не получить разорванное после рестарта БД
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # Стоимость bcrypt; при изменении старые хеши перехешируются при входе
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Потоки для хеширования паролей и сколько задач может ждать в очереди сверх них
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_QUEUE: int = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+    # Сжатие ответов: меньшие тела не сжимаем, уровни - компромисс размера и CPU
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    # Отложенная запись лайков: копим намерения и пишем пачкой раз в столько мс
+    # или как только их наберется столько
+    LIKE_BUFFER_ENABLED: bool = os.getenv("LIKE_BUFFER_ENABLED", "false").lower() in ("1", "true", "yes")
+    LIKE_BUFFER_INTERVAL_MS: int = int(os.getenv("LIKE_BUFFER_INTERVAL_MS", "50"))
+    LIKE_BUFFER_MAX_EVENTS: int = int(os.getenv("LIKE_BUFFER_MAX_EVENTS", "500"))
+    # Тренды: за сколько часов вклад лайка падает вдвое, веса событий
+    # и как часто фоновая задача учитывает новые (0 - не запускать)
+    TRENDING_HALF_LIFE_HOURS: float = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "72"))
+    TRENDING_LIKE_WEIGHT: float = float(os.getenv("TRENDING_LIKE_WEIGHT", "1"))
+    TRENDING_FAVORITE_WEIGHT: float = float(os.getenv("TRENDING_FAVORITE_WEIGHT", "2"))
+    TRENDING_REFRESH_SECONDS: float = float(os.getenv("TRENDING_REFRESH_SECONDS", "60"))
+    # Токен сборщика метрик для /metrics, /health/pool и /cache/stats
+    # (без него эти эндпоинты доступны только администратору)
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    # Кэш готовых HTML-страниц: сколько страниц держим и сколько секунд
+    PAGE_CACHE_SIZE: int = int(os.getenv("PAGE_CACHE_SIZE", "512"))
+    PAGE_CACHE_TTL: float = float(os.getenv("PAGE_CACHE_TTL", "60"))
+    # Кэш пользователей по токену: избавляет авторизованные запросы от SELECT в users
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "300"))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Границы корзин гистограмм (как у prometheus_client по умолчанию)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestStats:
+    """Запросы к БД в рамках одного HTTP-запроса"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class Metrics:
+    """Метрики приложения в текстовом формате Prometheus (без зависимостей)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.db_time: Dict[Tuple[str, str], float] = defaultdict(float)
+
+    def observe_request(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        key = (method, route)
+        self.requests[(method, route, str(status))] += 1
+        self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(duration)
+        self.queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+        self.db_time[key] += stats.db_time
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total HTTP requests by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), value in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {value}')
+
+        self._render_histogram(lines, "http_request_duration_seconds", "HTTP request latency.", self.latency)
+        self._render_histogram(lines, "db_queries_per_request", "SQL statements executed per HTTP request.", self.queries)
+
+        lines += [
+            "# HELP db_query_duration_seconds_total Time spent in SQL statements by route.",
+            "# TYPE db_query_duration_seconds_total counter",
+        ]
+        for (method, route), value in sorted(self.db_time.items()):
+            lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{route}"}} {value:.6f}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(lines, name, help_text, histograms):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (method, route), histogram in sorted(histograms.items()):
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время, статус и число SQL-запросов на каждый маршрут.
+
+    Маршрут берется шаблоном (/api/posts/{post_id}), а не фактическим путем,
+    чтобы число рядов метрик не зависело от id; ненайденные пути идут в "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"], route.path if route is not None else "unmatched",
+                status, time.perf_counter() - started, stats,
+            )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    stats = current_request.get()
+    if stats is not None and started is not None:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+# Заголовок, в котором отдаем курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Больше строк за один запрос списки не отдают: дальше - по курсору
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Упаковывает ключ (created_at, id) в непрозрачную строку"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Распаковывает курсор, при мусоре на входе отдает 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def encode_score_cursor(score: float, row_id: int) -> str:
+    """Курсор для лент, упорядоченных по (score, id)"""
+    raw = json.dumps([score, row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_score_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, row_id = json.loads(raw)
+        return float(score), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def apply_cursor(stmt, created_column, id_column, cursor: Optional[str], descending: bool = True):
+    """Добавляет к запросу сортировку по (created_at, id) и условие начала страницы.
+
+    Условие по ключу вместо OFFSET позволяет БД сразу перейти к нужному месту
+    индекса (created_at, id), поэтому стоимость страницы не зависит от глубины.
+    """
+    key = tuple_(created_column, id_column)
+    if descending:
+        stmt = stmt.order_by(created_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(created_column.asc(), id_column.asc())
+
+    if cursor:
+        position = tuple_(*decode_cursor(cursor))
+        stmt = stmt.where(key < position if descending else key > position)
+    return stmt
+
+
+def split_page(rows, limit: int, get_key, encode=encode_cursor):
+    """Отрезает лишнюю строку (запрашиваем limit + 1) и возвращает курсор следующей страницы"""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows:
+            return rows, encode(*get_key(rows[-1]))
+    return rows, None
+
+
+def trim_page(rows, limit: int, response: Response, get_key, encode=encode_cursor):
+    """То же, что split_page, но курсор кладет в заголовок ответа"""
+    rows, next_cursor = split_page(rows, limit, get_key, encode)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
@@ -0,0 +1,16 @@
+from typing import Any, Optional
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+
+def rows_response(content: Any, response: Optional[Response] = None) -> ORJSONResponse:
+    """Готовые dict-ы сразу в orjson, без повторной валидации через response_model.
+
+    response - внедренный FastAPI Response: заголовки (курсор, ETag) переносим,
+    иначе они потеряются, когда эндпоинт возвращает свой Response.
+    """
+    result = ORJSONResponse(content)
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+    return result
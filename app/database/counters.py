@@ -0,0 +1,38 @@
+from typing import Iterable
+from sqlalchemy import select, update, func, or_
+from app.database.models import Post, Like, favorites
+
+
+def change_counter(column, post_ids, delta: int):
+    """UPDATE счетчика поста на delta.
+
+    updated_at передаем явно, иначе сработает onupdate и лайк будет
+    выглядеть как правка содержимого поста.
+    """
+    if isinstance(post_ids, int):
+        condition = Post.id == post_ids
+    else:
+        condition = Post.id.in_(post_ids)
+    return update(Post).where(condition).values({column: column + delta, Post.updated_at: Post.updated_at})
+
+
+def reconcile_statement(first_id: int, last_id: int):
+    """Пересчитывает счетчики постов в диапазоне id, трогает только расхождения"""
+    real_likes = select(func.count()).select_from(Like).where(Like.post_id == Post.id).scalar_subquery()
+    real_favorites = select(func.count()).select_from(favorites) \
+        .where(favorites.c.post_id == Post.id).scalar_subquery()
+
+    return update(Post).where(
+        Post.id.between(first_id, last_id),
+        or_(Post.likes_count != real_likes, Post.favorites_count != real_favorites)
+    ).values({
+        Post.likes_count: real_likes,
+        Post.favorites_count: real_favorites,
+        Post.updated_at: Post.updated_at
+    })
+
+
+def id_batches(max_id: int, batch_size: int) -> Iterable[tuple]:
+    """Диапазоны id по batch_size, чтобы не держать блокировку на всей таблице"""
+    for first_id in range(1, max_id + 1, batch_size):
+        yield first_id, min(first_id + batch_size - 1, max_id)
@@ -1,17 +1,120 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import settings
 
-# Создаем движок БД
-engine = create_engine(settings.DATABASE_URL)
+# Асинхронные драйверы для синхронных URL из настроек (alembic работает с обычными)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Подменяет синхронный драйвер в URL на асинхронный"""
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if backend in ASYNC_DRIVERS and db_url.drivername != ASYNC_DRIVERS[backend]:
+        db_url = db_url.set(drivername=ASYNC_DRIVERS[backend])
+    return db_url.render_as_string(hide_password=False)
+
+
+def enable_sqlite_foreign_keys(engine):
+    """SQLite без PRAGMA foreign_keys не проверяет ссылки и не выполняет ON DELETE CASCADE"""
+    engine = getattr(engine, "sync_engine", engine)
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class PoolStats:
+    """Сколько запросы ждут соединение из пула"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        return {
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 3) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который замеряет ожидание соединения в момент, когда оно действительно нужно.
+
+    Соединение берется лениво, при первом запросе к базе: ответы из кэша пул не трогают.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def pool_status(engine) -> dict:
+    """Состояние пула: занятые, свободные и временные (overflow) соединения"""
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"pool": type(pool).__name__}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    if hasattr(pool, "timeout"):
+        status["max_overflow"] = settings.DB_MAX_OVERFLOW
+        status["timeout"] = pool.timeout()
+    status.update(pool_stats.snapshot())
+    return status
+
+
+def get_pool_options(url: str) -> dict:
+    """Параметры пула из настроек; aiosqlite работает без пула (NullPool)"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# Создаем асинхронный движок БД
+engine = create_async_engine(get_async_database_url(settings.DATABASE_URL), **get_pool_options(settings.DATABASE_URL))
+enable_sqlite_foreign_keys(engine)
 
-# Создаем фабрику сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Создаем фабрику сессий (expire_on_commit=False, чтобы после commit
+# не было неявных запросов при чтении атрибутов)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Зависимость для получения сессии БД
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
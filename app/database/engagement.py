@@ -0,0 +1,100 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import delete, literal, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.counters import change_counter
+from app.database.models import Like, Post, User, favorites
+
+# Таблица отметок -> счетчик поста, который она питает
+COUNTERS = {
+    Like.__table__: Post.likes_count,
+    favorites: Post.favorites_count,
+}
+# Пар (user_id, post_id) в одном INSERT/DELETE - с запасом до лимита параметров SQLite
+PAIRS_PER_STATEMENT = 1000
+
+
+def dialect_insert(db, table):
+    """INSERT с on_conflict_*: в Postgres и SQLite синтаксис одинаковый. db - сессия или соединение"""
+    bind = db.get_bind() if isinstance(db, AsyncSession) else db
+    dialect = postgresql if bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+
+async def mark_posts(db: AsyncSession, table, user_id: int, post_ids: Iterable[int]) -> List[Row]:
+    """Ставит отметки (лайк или избранное) одним INSERT ... ON CONFLICT DO NOTHING.
+
+    Строки берутся SELECT-ом из posts, поэтому несуществующие посты просто
+    пропускаются. Возвращает только вставленные строки; счетчик увеличиваем
+    только их постам. Коммит - на вызывающем.
+    """
+    post_ids = list(set(post_ids))
+    if not post_ids:
+        return []
+    stmt = dialect_insert(db, table).from_select(
+        ["user_id", "post_id", "created_at"],
+        select(literal(user_id), Post.id, literal(datetime.utcnow())).where(Post.id.in_(post_ids))
+    ).on_conflict_do_nothing().returning(*table.c)
+    inserted = list((await db.execute(stmt)).all())
+    if inserted:
+        await db.execute(change_counter(COUNTERS[table], [row.post_id for row in inserted], 1))
+    return inserted
+
+
+async def unmark_posts(db: AsyncSession, table, user_id: int, post_ids: Iterable[int]) -> List[int]:
+    """Снимает отметки одним DELETE ... RETURNING, счетчики уменьшает только там, где строка была"""
+    post_ids = list(set(post_ids))
+    if not post_ids:
+        return []
+    changed = list((await db.scalars(
+        delete(table).where(table.c.user_id == user_id, table.c.post_id.in_(post_ids)).returning(table.c.post_id)
+    )).all())
+    if changed:
+        await db.execute(change_counter(COUNTERS[table], changed, -1))
+    return changed
+
+
+async def change_counters(db: AsyncSession, column, post_ids: List[int], sign: int):
+    """Счетчики по списку с повторами: один UPDATE на каждую величину изменения, а не на строку"""
+    by_delta = defaultdict(list)
+    for post_id, count in Counter(post_ids).items():
+        by_delta[count * sign].append(post_id)
+    for delta, ids in by_delta.items():
+        await db.execute(change_counter(column, ids, delta))
+
+
+async def mark_pairs(db: AsyncSession, table, pairs: List[Tuple[int, int]]) -> List[int]:
+    """Отметки сразу от многих пользователей: пары (user_id, post_id).
+
+    Пары с удаленными постами или пользователями отбрасываются, повторы гасит
+    ON CONFLICT DO NOTHING. Возвращает post_id вставленных строк (с повторами).
+    """
+    posts = set((await db.scalars(select(Post.id).where(Post.id.in_({post_id for _, post_id in pairs})))).all())
+    users = set((await db.scalars(select(User.id).where(User.id.in_({user_id for user_id, _ in pairs})))).all())
+    now = datetime.utcnow()
+    rows = [{"user_id": user_id, "post_id": post_id, "created_at": now}
+            for user_id, post_id in pairs if post_id in posts and user_id in users]
+    changed = []
+    for start in range(0, len(rows), PAIRS_PER_STATEMENT):
+        changed += (await db.scalars(
+            dialect_insert(db, table).values(rows[start:start + PAIRS_PER_STATEMENT])
+            .on_conflict_do_nothing().returning(table.c.post_id)
+        )).all()
+    await change_counters(db, COUNTERS[table], changed, 1)
+    return changed
+
+
+async def unmark_pairs(db: AsyncSession, table, pairs: List[Tuple[int, int]]) -> List[int]:
+    changed = []
+    for start in range(0, len(pairs), PAIRS_PER_STATEMENT):
+        changed += (await db.scalars(
+            delete(table).where(tuple_(table.c.user_id, table.c.post_id).in_(pairs[start:start + PAIRS_PER_STATEMENT]))
+            .returning(table.c.post_id)
+        )).all()
+    await change_counters(db, COUNTERS[table], changed, -1)
+    return changed
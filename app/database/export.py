@@ -0,0 +1,61 @@
+import csv
+import io
+import zlib
+from typing import AsyncIterator, Optional
+
+import orjson
+from sqlalchemy import select
+
+from app.database.like_buffer import like_buffer
+from app.database.models import Post, User
+
+EXPORT_FORMATS = ("ndjson", "csv")
+# Строк в одной порции с серверного курсора
+EXPORT_BATCH_SIZE = 1000
+
+
+def export_statement():
+    """Все посты с логином автора и счетчиками, по возрастанию id.
+
+    likes_count - с учетом еще не записанных лайков на момент начала выгрузки.
+    """
+    return select(
+        Post.id, Post.author_id, User.login.label("author_login"), Post.title, Post.content,
+        Post.created_at, Post.updated_at,
+        (Post.likes_count + like_buffer.pending_likes(Post.id)).label("likes_count"), Post.favorites_count
+    ).join(User, Post.author_id == User.id).order_by(Post.id)
+
+
+async def export_posts(db, fmt: str = "ndjson", batch_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Выгрузка постов кусками байт.
+
+    db - AsyncSession или AsyncConnection; строки идут с серверного курсора
+    порциями по batch_size, так что память не зависит от размера таблицы.
+    """
+    result = await db.stream(export_statement().execution_options(yield_per=batch_size or EXPORT_BATCH_SIZE))
+    columns = list(result.keys())
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for rows in result.partitions():
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    else:
+        # orjson, как в JSON API: даты в ISO 8601
+        async for rows in result.partitions():
+            yield b"".join(orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Сжимает поток на лету (формат gzip)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, exists, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.database.engagement import mark_pairs, unmark_pairs
+from app.database.models import Like, Post
+
+logger = logging.getLogger(__name__)
+
+
+class LikeBuffer:
+    """Отложенная запись лайков (write-behind).
+
+    Лайк/анлайк не коммитится сразу, а попадает в очередь намерений
+    {(user_id, post_id): лайкнут ли}. Фоновая задача раз в interval секунд или
+    после max_events намерений пишет их одной транзакцией: один INSERT, один
+    DELETE и по UPDATE на каждую величину изменения счетчика, вместо коммита на
+    каждый лайк горячего поста. Пока намерения не записаны, чтение видит их
+    через adjust(). При остановке приложения очередь дописывается.
+    """
+
+    def __init__(self, session_factory=SessionLocal, interval_ms: int = settings.LIKE_BUFFER_INTERVAL_MS,
+                 max_events: int = settings.LIKE_BUFFER_MAX_EVENTS, enabled: bool = settings.LIKE_BUFFER_ENABLED):
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.max_events = max_events
+        self.enabled = enabled
+        # Последнее намерение и состояние в базе на момент первого намерения
+        self._intents: Dict[Tuple[int, int], bool] = {}
+        self._base: Dict[Tuple[int, int], bool] = {}
+        self._deltas: Dict[int, int] = {}
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.batches = 0
+        self.errors = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._intents)
+
+    async def add(self, db: AsyncSession, user_id: int, post_id: int, liked: bool) -> Optional[bool]:
+        """Ставит намерение в очередь.
+
+        True - состояние поменяется, False - уже такое (повторный лайк),
+        None - поста нет. db нужна только для чтения текущего состояния.
+        """
+        return (await self.add_many(db, user_id, [post_id], liked))[post_id]
+
+    async def add_many(self, db: AsyncSession, user_id: int, post_ids: List[int],
+                       liked: bool) -> Dict[int, Optional[bool]]:
+        """То же для нескольких постов: состояние еще не известных читается одним запросом"""
+        post_ids = list(dict.fromkeys(post_ids))
+        unknown = [post_id for post_id in post_ids if (user_id, post_id) not in self._intents]
+        if unknown:
+            rows = (await db.execute(
+                select(Post.id, exists().where(Like.post_id == Post.id, Like.user_id == user_id))
+                .where(Post.id.in_(unknown))
+            )).all()
+            for post_id, stored in rows:
+                # Пока ждали базу, такой же запрос мог успеть встать в очередь
+                self._intents.setdefault((user_id, post_id), bool(stored))
+                self._base.setdefault((user_id, post_id), bool(stored))
+
+        result = {}
+        for post_id in post_ids:
+            key = (user_id, post_id)
+            if key not in self._intents:
+                result[post_id] = None
+            elif self._intents[key] == liked:
+                result[post_id] = False
+            else:
+                self._intents[key] = liked
+                self._deltas[post_id] = self._deltas.get(post_id, 0) + (1 if liked else -1)
+                result[post_id] = True
+        if self._wakeup is not None and len(self._intents) >= self.max_events:
+            self._wakeup.set()
+        return result
+
+    def forget_user(self, user_id: int):
+        """Убирает намерения удаленного пользователя: его строки в базу уже не запишутся"""
+        for key in [key for key in self._intents if key[0] == user_id]:
+            del self._intents[key], self._base[key]
+        self._recount()
+
+    def adjust(self, post_id: int, likes_count: int, liked: bool, user_id: Optional[int] = None) -> Tuple[int, bool]:
+        """Счетчик и отметка пользователя с учетом еще не записанных намерений"""
+        if not self._intents:
+            return likes_count, liked
+        if user_id is not None:
+            liked = self._intents.get((user_id, post_id), liked)
+        return likes_count + self._deltas.get(post_id, 0), liked
+
+    def pending_likes(self, post_id_column):
+        """То же для SQL: выражение с еще не записанным изменением счетчика поста.
+
+        Для запросов, где строк постов в Python нет (суммы, потоковая выгрузка).
+        """
+        if not self._deltas:
+            return literal(0)
+        return case(dict(self._deltas), value=post_id_column, else_=0)
+
+    async def flush(self) -> int:
+        """Пишет накопленное одной транзакцией, возвращает число измененных строк.
+
+        Намерения убираются из очереди только после коммита, так что чтение не
+        видит провала счетчика, а при ошибке они уйдут со следующей попыткой.
+        """
+        async with self._lock:
+            snapshot = dict(self._intents)
+            likes = [key for key, liked in snapshot.items() if liked and not self._base[key]]
+            unlikes = [key for key, liked in snapshot.items() if not liked and self._base[key]]
+            changed = 0
+            if likes or unlikes:
+                async with self.session_factory() as db:
+                    if likes:
+                        changed += len(await mark_pairs(db, Like.__table__, likes))
+                    if unlikes:
+                        changed += len(await unmark_pairs(db, Like.__table__, unlikes))
+                    await db.commit()
+                self.batches += 1
+                self.flushed += len(likes) + len(unlikes)
+
+            for key, liked in snapshot.items():
+                if self._intents.get(key) == liked:
+                    del self._intents[key], self._base[key]
+                else:
+                    # Пока писали, пришло новое намерение: записанное стало состоянием базы
+                    self._base[key] = liked
+            self._recount()
+            return changed
+
+    def _recount(self):
+        """Пересчитывает изменения счетчиков по очереди намерений"""
+        self._deltas = {}
+        for key, liked in self._intents.items():
+            delta = int(liked) - int(self._base[key])
+            if delta:
+                self._deltas[key[1]] = self._deltas.get(key[1], 0) + delta
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                self.errors += 1
+                logger.exception("Ошибка записи лайков из буфера")
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую запись и дописывает очередь"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = self._wakeup = None
+        await self.flush()
+
+    def render(self) -> str:
+        """Метрики в формате Prometheus"""
+        return "\n".join([
+            "# HELP like_buffer_pending Like intents waiting to be written.",
+            "# TYPE like_buffer_pending gauge",
+            f"like_buffer_pending {self.pending}",
+            "# HELP like_buffer_flushed_total Like intents written to the database.",
+            "# TYPE like_buffer_flushed_total counter",
+            f"like_buffer_flushed_total {self.flushed}",
+            "# HELP like_buffer_batches_total Write-behind transactions.",
+            "# TYPE like_buffer_batches_total counter",
+            f"like_buffer_batches_total {self.batches}",
+            "# HELP like_buffer_errors_total Failed write-behind transactions.",
+            "# TYPE like_buffer_errors_total counter",
+            f"like_buffer_errors_total {self.errors}",
+        ]) + "\n"
+
+
+like_buffer = LikeBuffer()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Table, Boolean, UniqueConstraint, Index, func, literal_column
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,7 +11,10 @@ favorites = Table(
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True),
     Column('post_id', Integer, ForeignKey('posts.id', ondelete="CASCADE"), primary_key=True),
-    Column('created_at', DateTime, default=datetime.utcnow)
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Index('ix_favorites_post_id', 'post_id'),
+    # Пересчет трендов читает только новые добавления
+    Index('ix_favorites_created_at', 'created_at', 'user_id', 'post_id')
 )
 
 class User(Base):
@@ -30,6 +33,24 @@ class User(Base):
     posts = relationship("Post", back_populates="author")
     favorite_posts = relationship("Post", secondary=favorites, back_populates="favorited_by")
 
+    # Для ключевой пагинации по (created_at, id)
+    __table_args__ = (Index('ix_users_created_at_id', 'created_at', 'id'),)
+
+
+# Конфигурация полнотекстового поиска Postgres
+SEARCH_CONFIG = "'russian'::regconfig"
+
+
+def post_search_vector(title, content):
+    """tsvector поста: слова заголовка (вес A) важнее слов текста (вес B).
+    Запросы должны строить выражение именно этой функцией, иначе Postgres
+    не узнает в нем GIN-индекс ix_posts_search."""
+    config = literal_column(SEARCH_CONFIG)
+    return func.setweight(func.to_tsvector(config, title), literal_column("'A'")).op("||")(
+        func.setweight(func.to_tsvector(config, content), literal_column("'B'"))
+    )
+
+
 class Post(Base):
     __tablename__ = "posts"
 
@@ -39,16 +60,77 @@ class Post(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Денормализованные счетчики, меняются в одной транзакции с likes/favorites
+    likes_count = Column(Integer, nullable=False, default=0, server_default='0')
+    favorites_count = Column(Integer, nullable=False, default=0, server_default='0')
     author = relationship("User", back_populates="posts")
     favorited_by = relationship("User", secondary=favorites, back_populates="favorite_posts")
 
+    __table_args__ = (
+        # Для ключевой пагинации ленты по (created_at, id)
+        Index('ix_posts_created_at_id', 'created_at', 'id'),
+        # Посты автора по (created_at, id) и итоги по автору
+        Index('ix_posts_author_id_created_at', 'author_id', 'created_at', 'id'),
+        # Полнотекстовый поиск, только в Postgres
+        Index('ix_posts_search', post_search_vector(title, content), postgresql_using='gin')
+        .ddl_if(dialect='postgresql'),
+    )
+
 
 class Like(Base):
     __tablename__ = "likes"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    __table_args__ = (UniqueConstraint('user_id', 'post_id', name='unique_user_post_like'),)
\ No newline at end of file
+    # Без AUTOINCREMENT SQLite отдает id удаленной последней строки повторно, а пересчет
+    # трендов идет по возрастанию id (в Postgres последовательность id не повторяет)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'post_id', name='unique_user_post_like'),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class PostScore(Base):
+    """Счет поста для ленты трендов.
+
+    score хранится приведенным к эпохе из TrendingState: вклад события
+    weight * 2^((время события - эпоха) / период полураспада). Затухание
+    одинаково для всех постов, поэтому порядок по score - это порядок по
+    текущему счету, и строки не нужно переписывать при каждом пересчете.
+    """
+    __tablename__ = "post_scores"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (Index('ix_post_scores_score_post_id', 'score', 'post_id'),)
+
+
+class TrendingState(Base):
+    """Одна строка: эпоха счетов и докуда уже учтены лайки и избранное"""
+    __tablename__ = "trending_state"
+
+    id = Column(Integer, primary_key=True)
+    epoch = Column(DateTime, nullable=False)
+    last_like_id = Column(Integer, nullable=False, default=0)
+    # Избранное идет по (created_at, user_id, post_id): отметки времени могут совпадать
+    last_favorite_at = Column(DateTime, nullable=True)
+    last_favorite_user_id = Column(Integer, nullable=True)
+    last_favorite_post_id = Column(Integer, nullable=True)
+    refreshed_at = Column(DateTime, nullable=True)
+
+
+class ScoredPair(Base):
+    """Пары (пользователь, пост), уже учтенные в счете, отдельно для лайков и избранного.
+
+    Повторный лайк после снятия - новая строка в likes; засчитывается только первый.
+    """
+    __tablename__ = "scored_pairs"
+
+    kind = Column(String(8), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.database.engagement import PAIRS_PER_STATEMENT, dialect_insert
+from app.database.models import Like, PostScore, ScoredPair, TrendingState, favorites
+
+# Событий в одной транзакции пересчета
+REFRESH_BATCH_SIZE = 10000
+# Совсем свежие события не берем: транзакции с меньшим id могут еще не закоммититься
+SETTLE_SECONDS = 5
+# Через столько периодов полураспада счета переводятся на новую эпоху, чтобы не уйти за пределы float
+REBASE_HALF_LIVES = 64
+STATE_ID = 1
+
+logger = logging.getLogger(__name__)
+
+LIKE, FAVORITE = "like", "favorite"
+
+
+def weight(kind: str) -> float:
+    return settings.TRENDING_LIKE_WEIGHT if kind == LIKE else settings.TRENDING_FAVORITE_WEIGHT
+
+
+def half_life_seconds() -> float:
+    return settings.TRENDING_HALF_LIFE_HOURS * 3600
+
+
+def event_score(weight: float, at: datetime, epoch: datetime) -> float:
+    """Вклад события в хранимый score (приведенный к эпохе)"""
+    return weight * 2 ** ((at - epoch).total_seconds() / half_life_seconds())
+
+
+def decay_factor(epoch: datetime, now: datetime) -> float:
+    """Множитель от хранимого score к текущему"""
+    return 2 ** (-(now - epoch).total_seconds() / half_life_seconds())
+
+
+async def load_state(conn: AsyncConnection, now: datetime):
+    state = (await conn.execute(select(TrendingState).where(TrendingState.id == STATE_ID))).first()
+    if state is None:
+        await conn.execute(TrendingState.__table__.insert().values(id=STATE_ID, epoch=now, last_like_id=0))
+        state = (await conn.execute(select(TrendingState).where(TrendingState.id == STATE_ID))).first()
+    return state
+
+
+async def add_scores(conn: AsyncConnection, scores: Dict[int, float], now: datetime):
+    """score += вклад одним INSERT ... ON CONFLICT DO UPDATE"""
+    if not scores:
+        return
+    stmt = dialect_insert(conn, PostScore.__table__).values([
+        {"post_id": post_id, "score": score, "updated_at": now} for post_id, score in scores.items()
+    ])
+    await conn.execute(stmt.on_conflict_do_update(
+        index_elements=[PostScore.post_id],
+        set_={"score": PostScore.score + stmt.excluded.score, "updated_at": stmt.excluded.updated_at}
+    ))
+
+
+async def rebase(conn: AsyncConnection, state, now: datetime):
+    """Переводит все счета на эпоху now; порядок постов не меняется"""
+    await conn.execute(update(PostScore).values(score=PostScore.score * decay_factor(state.epoch, now)))
+    await conn.execute(update(TrendingState).where(TrendingState.id == STATE_ID).values(epoch=now))
+
+
+async def claim_pairs(conn: AsyncConnection, events: List[tuple]) -> Set[tuple]:
+    """Отмечает пары как учтенные; возвращает (kind, user_id, post_id), которых раньше не было.
+
+    Лайк, снятый и поставленный снова, - новая строка в likes, но второй раз счет не растет.
+    """
+    claimed = set()
+    rows = [{"kind": kind, "user_id": user_id, "post_id": post_id} for kind, user_id, post_id, _ in events]
+    for start in range(0, len(rows), PAIRS_PER_STATEMENT):
+        claimed.update((await conn.execute(
+            dialect_insert(conn, ScoredPair.__table__).values(rows[start:start + PAIRS_PER_STATEMENT])
+            .on_conflict_do_nothing()
+            .returning(ScoredPair.kind, ScoredPair.user_id, ScoredPair.post_id)
+        )).all())
+    return claimed
+
+
+async def refresh_batch(conn: AsyncConnection, now: datetime, batch_size: int) -> int:
+    """Учитывает следующую пачку новых лайков и добавлений в избранное"""
+    state = await load_state(conn, now)
+    if (now - state.epoch).total_seconds() > REBASE_HALF_LIVES * half_life_seconds():
+        await rebase(conn, state, now)
+        state = await load_state(conn, now)
+    cutoff = now - timedelta(seconds=SETTLE_SECONDS)
+    events = []
+
+    # Лайки по возрастанию id; останавливаемся на первом слишком свежем
+    likes = (await conn.execute(
+        select(Like.id, Like.user_id, Like.post_id, Like.created_at).where(Like.id > state.last_like_id)
+        .order_by(Like.id).limit(batch_size)
+    )).all()
+    last_like_id = state.last_like_id
+    for like_id, user_id, post_id, created_at in likes:
+        if created_at > cutoff:
+            break
+        events.append((LIKE, user_id, post_id, created_at))
+        last_like_id = like_id
+
+    # У избранного нет id: идем по (created_at, user_id, post_id), отметки времени могут совпадать
+    key = tuple_(favorites.c.created_at, favorites.c.user_id, favorites.c.post_id)
+    condition = favorites.c.created_at <= cutoff
+    if state.last_favorite_at is not None:
+        condition = condition & (key > tuple_(
+            literal(state.last_favorite_at), literal(state.last_favorite_user_id), literal(state.last_favorite_post_id)
+        ))
+    favorite_rows = (await conn.execute(
+        select(favorites.c.user_id, favorites.c.post_id, favorites.c.created_at).where(condition)
+        .order_by(favorites.c.created_at, favorites.c.user_id, favorites.c.post_id).limit(batch_size)
+    )).all()
+    events += [(FAVORITE, user_id, post_id, created_at) for user_id, post_id, created_at in favorite_rows]
+
+    claimed = await claim_pairs(conn, events)
+    scores = defaultdict(float)
+    for kind, user_id, post_id, created_at in events:
+        if (kind, user_id, post_id) in claimed:
+            scores[post_id] += event_score(weight(kind), created_at, state.epoch)
+    await add_scores(conn, scores, now)
+
+    watermark = {}
+    if favorite_rows:
+        last = favorite_rows[-1]
+        watermark = {"last_favorite_at": last.created_at, "last_favorite_user_id": last.user_id,
+                     "last_favorite_post_id": last.post_id}
+    await conn.execute(update(TrendingState).where(TrendingState.id == STATE_ID).values(
+        last_like_id=last_like_id, refreshed_at=now, **watermark
+    ))
+    return len(events)
+
+
+async def refresh_scores(engine: AsyncEngine, now: Optional[datetime] = None,
+                         batch_size: int = REFRESH_BATCH_SIZE) -> int:
+    """Инкрементальный пересчет: только события после прошлого запуска, пачками,
+    каждая пачка в своей транзакции. Возвращает число учтенных событий.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            processed = await refresh_batch(conn, now, batch_size)
+        total += processed
+        if not processed:
+            return total
+
+
+class TrendingRefresher:
+    """Фоновый пересчет трендов раз в interval секунд"""
+
+    def __init__(self, engine: AsyncEngine, interval: float = settings.TRENDING_REFRESH_SECONDS):
+        self.engine = engine
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await refresh_scores(self.engine)
+            except Exception:
+                logger.exception("Ошибка пересчета трендов")
+
+    def start(self):
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
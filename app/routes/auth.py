@@ -1,15 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+import hmac
+import time
+from datetime import datetime
 from pydantic import BaseModel
+from typing import Optional
 from app.database.database import get_db
 from app.database.models import User
-from app.core.security import verify_password, create_access_token, decode_access_token, get_password_hash
+from app.core.security import create_access_token, decode_access_token, hash_password, check_password
+from app.core.cache import user_cache
+from app.core.config import settings
 
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+# Для публичных эндпоинтов: без токена не отдаем 401
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 # Модель для регистрации
 class UserRegister(BaseModel):
@@ -32,7 +41,28 @@ class UserResponse(BaseModel):
     email: str
     is_admin: bool
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# Снимок пользователя для зависимостей: не привязан к сессии, поэтому его можно кэшировать
+class CurrentUser(BaseModel):
+    id: int
+    login: str
+    email: str
+    is_admin: bool
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+def forget_user(user_id: int):
+    """Сбрасывает кэш токенов пользователя после изменения или удаления"""
+    user_cache.invalidate(f"user:{user_id}")
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+    version = user_cache.version
+
     payload = decode_access_token(token)
     if not payload:
         raise HTTPException(
@@ -50,7 +80,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         )
 
     try:
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = await db.get(User, int(user_id))
     except:
         user = None
 
@@ -60,16 +90,53 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+
+    current_user = CurrentUser(
+        id=user.id,
+        login=user.login,
+        email=user.email,
+        is_admin=bool(user.is_admin),
+        is_active=bool(user.is_active),
+        created_at=user.created_at,
+        updated_at=user.updated_at
+    )
+    # Запись не должна жить дольше самого токена
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    user_cache.set(token, current_user, tags=[f"user:{user.id}"], version=version, ttl=expires_in)
+    return current_user
+
+
+async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional),
+                                    db: AsyncSession = Depends(get_db)):
+    """Текущий пользователь или None для анонимного запроса"""
+    if not token:
+        return None
+    try:
+        return await get_current_user(token, db)
+    except HTTPException:
+        return None
+
+async def require_ops_access(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    """Служебные эндпоинты: токен METRICS_TOKEN (для Prometheus) или токен администратора"""
+    if settings.METRICS_TOKEN and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        return
+    user = await get_current_user(token, db)
+    if not user.is_admin:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
 
 @router.post("/login", response_model=TokenResponse)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.login == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.login == form_data.username))
+    valid, new_hash = await check_password(form_data.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid credentials"
         )
+    if new_hash:
+        # Поменялась стоимость bcrypt - обновляем хеш, пока знаем пароль
+        user.hashed_password = new_hash
+        await db.commit()
     access_token = create_access_token(data={"sub": str(user.id)})
 
     return TokenResponse(
@@ -81,13 +148,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     )
 
 @router.post("/register")
-async def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user_data.email).first():
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
+    if await db.scalar(select(User).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already exists"
         )
-    if db.query(User).filter(User.login == user_data.login).first():
+    if await db.scalar(select(User).where(User.login == user_data.login)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Login already exists"
@@ -96,12 +163,12 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     user = User(
         email=user_data.email,
         login=user_data.login,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await hash_password(user_data.password),
         is_admin=False
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return {
         "message": "User created successfully",
@@ -111,7 +178,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
 
 # Эндпоинт для получения информации о текущем пользователе
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     return UserResponse(
         id=current_user.id,
         login=current_user.login,
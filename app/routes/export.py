@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import get_db
+from app.database.export import EXPORT_FORMATS, export_posts, gzip_chunks
+from app.routes.auth import CurrentUser, get_current_user
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+@router.get("/posts")
+async def export_all_posts(format: str = "ndjson", gzip: bool = False, db: AsyncSession = Depends(get_db),
+                           current_user: CurrentUser = Depends(get_current_user)):
+    """Выгрузка всех постов с автором и счетчиками (только админ).
+
+    Ответ отдается потоком прямо с серверного курсора; сессия из get_db
+    закрывается после отправки ответа.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Формат должен быть ndjson или csv")
+
+    filename = f"posts-{datetime.utcnow():%Y%m%d}.{format}"
+    chunks = export_posts(db, format)
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        chunks, media_type, filename = gzip_chunks(chunks), "application/gzip", filename + ".gz"
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
@@ -1,45 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.database.database import get_db
 from app.database.models import User, Post, favorites
 from app.schemas.posts import PostResponse
-from app.routes.auth import get_current_user
+from app.routes.auth import CurrentUser, get_current_user
+from app.routes.posts import PostFields, post_columns, post_row
+from app.database.engagement import mark_posts, unmark_posts
+from app.schemas.likes import PostIdsBulk, BulkMarkResult
+from app.routes.likes import bulk_result
+from app.core.pagination import apply_cursor, trim_page, MAX_PAGE_SIZE
+from app.core.responses import rows_response
 
 router = APIRouter(prefix="/api/favorites", tags=["favorites"])
 
 
+@router.post("/bulk", response_model=BulkMarkResult)
+async def add_many_to_favorites(
+        body: PostIdsBulk,
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Добавить несколько постов в избранное одной транзакцией"""
+    inserted = await mark_posts(db, favorites, current_user.id, body.post_ids)
+    await db.commit()
+    return bulk_result(body.post_ids, (row.post_id for row in inserted))
+
+
+@router.post("/bulk-delete", response_model=BulkMarkResult)
+async def remove_many_from_favorites(
+        body: PostIdsBulk,
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Удалить несколько постов из избранного одной транзакцией"""
+    deleted = await unmark_posts(db, favorites, current_user.id, body.post_ids)
+    await db.commit()
+    return bulk_result(body.post_ids, deleted)
+
+
 @router.post("/{post_id}")
 async def add_to_favorites(
         post_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Добавить пост в избранное"""
-    # Проверяем существование поста
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Пост не найден")
-
-    # Проверяем не добавлен ли уже
-    existing_favorite = db.execute(
-        favorites.select().where(
-            favorites.c.user_id == current_user.id,
-            favorites.c.post_id == post_id
-        )
-    ).first()
-
-    if existing_favorite:
+    # Один INSERT ... ON CONFLICT DO NOTHING вместо проверки и вставки
+    if not await mark_posts(db, favorites, current_user.id, [post_id]):
+        if await db.scalar(select(Post.id).where(Post.id == post_id)) is None:
+            raise HTTPException(status_code=404, detail="Пост не найден")
         raise HTTPException(status_code=400, detail="Пост уже в избранном")
-
-    # Добавляем в избранное
-    db.execute(
-        favorites.insert().values(
-            user_id=current_user.id,
-            post_id=post_id
-        )
-    )
-    db.commit()
+    await db.commit()
 
     return {"message": "Пост добавлен в избранное"}
 
@@ -47,63 +60,54 @@ async def add_to_favorites(
 @router.delete("/{post_id}")
 async def remove_from_favorites(
         post_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Удалить пост из избранного"""
-    result = db.execute(
-        favorites.delete().where(
-            favorites.c.user_id == current_user.id,
-            favorites.c.post_id == post_id
-        )
-    )
-    db.commit()
-
-    if result.rowcount == 0:
+    if not await unmark_posts(db, favorites, current_user.id, [post_id]):
         raise HTTPException(status_code=404, detail="Пост не найден в избранном")
+    await db.commit()
 
     return {"message": "Пост удален из избранного"}
 
 
 @router.get("/", response_model=List[PostResponse])
 async def get_favorite_posts(
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        response: Response,
+        limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        view: PostFields = Depends(),
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Получить избранные посты пользователя"""
-    favorite_posts = db.query(Post, User.login).join(
-        User, Post.author_id == User.id
-    ).join(
-        favorites, favorites.c.post_id == Post.id
-    ).filter(
-        favorites.c.user_id == current_user.id
-    ).order_by(Post.created_at.desc()).all()
-
-    return [
-        PostResponse(
-            id=post.id,
-            author_id=post.author_id,
-            author_login=login,
-            title=post.title,
-            content=post.content,
-            created_at=post.created_at,
-            updated_at=post.updated_at
-        ) for post, login in favorite_posts
-    ]
+    """Избранные посты пользователя страницами, следующая - по курсору из X-Next-Cursor"""
+    stmt = apply_cursor(
+        select(*post_columns(current_user, view)).join(
+            User, Post.author_id == User.id
+        ).join(
+            favorites, favorites.c.post_id == Post.id
+        ).where(
+            favorites.c.user_id == current_user.id
+        ),
+        Post.created_at, Post.id, cursor
+    )
+    rows = (await db.execute(stmt.limit(limit + 1))).mappings().all()
+    rows = trim_page(rows, limit, response, lambda row: (row["created_at"], row["id"]))
+    return rows_response([post_row(row, view, current_user) for row in rows], response)
 
 
 @router.get("/check/{post_id}")
 async def check_favorite(
         post_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Проверить, есть ли пост в избранном"""
-    favorite = db.execute(
+    favorite = (await db.execute(
         favorites.select().where(
             favorites.c.user_id == current_user.id,
             favorites.c.post_id == post_id
         )
-    ).first()
+    )).first()
 
     return {"is_favorite": favorite is not None}
\ No newline at end of file
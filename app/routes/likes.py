@@ -1,39 +1,94 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, exists, literal
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.database import get_db
-from app.database.models import Like, Post, User
-from app.schemas.likes import LikeCreate, LikeResponse
-from app.routes.auth import get_current_user
+from app.database.models import Like, Post, favorites
+from app.database.engagement import mark_posts, unmark_posts
+from app.database.like_buffer import like_buffer
+from app.schemas.likes import LikeCreate, LikeResponse, PostEngagement, PostIdsBulk, BulkMarkResult
+from app.routes.auth import CurrentUser, get_current_user, get_current_user_optional
 
 router = APIRouter(prefix="/api/likes", tags=["likes"])
 
+# Сколько постов можно запросить за один раз в /counts
+MAX_BATCH_POST_IDS = 100
+
+
+def engagement_columns(user: Optional[CurrentUser] = None) -> list:
+    """Счетчики поста и отметки пользователя (EXISTS по уникальным индексам).
+
+    Подзапросы связаны только с posts: внешний запрос может сам join-ить favorites.
+    """
+    if user is None:
+        # Анониму отметки не нужны: константы вместо подзапросов
+        return [Post.likes_count, Post.favorites_count, literal(False).label("liked"), literal(False).label("favorited")]
+    return [
+        Post.likes_count,
+        Post.favorites_count,
+        exists().where(Like.post_id == Post.id, Like.user_id == user.id).correlate(Post).label("liked"),
+        exists().where(favorites.c.post_id == Post.id, favorites.c.user_id == user.id)
+        .correlate(Post).label("favorited"),
+    ]
+
+
+async def load_engagement(db: AsyncSession, post_ids: Iterable[int],
+                          user: Optional[CurrentUser] = None) -> Dict[int, PostEngagement]:
+    """Счетчики и отметки текущего пользователя для набора постов одним запросом.
+
+    Счетчики читаем из posts.likes_count / posts.favorites_count.
+    """
+    post_ids = list(set(post_ids))
+    result = {post_id: PostEngagement(post_id=post_id) for post_id in post_ids}
+    if not post_ids:
+        return result
+
+    stmt = select(Post.id, *engagement_columns(user)).where(Post.id.in_(post_ids))
+
+    for post_id, likes_count, favorites_count, liked, favorited in (await db.execute(stmt)).all():
+        likes_count, liked = like_buffer.adjust(post_id, likes_count, bool(liked), user.id if user else None)
+        result[post_id] = PostEngagement(
+            post_id=post_id,
+            likes_count=likes_count,
+            favorites_count=favorites_count,
+            liked_by_me=bool(liked),
+            favorited_by_me=bool(favorited)
+        )
+    return result
+
+
+def bulk_result(post_ids: List[int], changed: Iterable[int]) -> BulkMarkResult:
+    changed = set(changed)
+    requested = list(dict.fromkeys(post_ids))
+    return BulkMarkResult(
+        changed=[post_id for post_id in requested if post_id in changed],
+        unchanged=[post_id for post_id in requested if post_id not in changed]
+    )
 
-@router.post("/", response_model=LikeResponse)
-async def like_post(like: LikeCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Проверяем существование поста
-    post = db.query(Post).filter(Post.id == like.post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Пост не найден")
-
-    # Проверяем не лайкнул ли уже
-    existing_like = db.query(Like).filter(
-        Like.user_id == current_user.id,
-        Like.post_id == like.post_id
-    ).first()
 
-    if existing_like:
+@router.post("/", response_model=LikeResponse)
+async def like_post(like: LikeCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    if like_buffer.enabled:
+        # Отложенная запись: лайк принят, в базу попадет со следующей пачкой
+        changed = await like_buffer.add(db, current_user.id, like.post_id, True)
+        if changed is None:
+            raise HTTPException(status_code=404, detail="Пост не найден")
+        if not changed:
+            raise HTTPException(status_code=400, detail="Вы уже лайкнули этот пост")
+        # Тот же ответ, что и без буфера; id у строки появится только после записи
+        return LikeResponse(user_id=current_user.id, post_id=like.post_id, created_at=datetime.utcnow())
+
+    # Один INSERT ... ON CONFLICT DO NOTHING: гонка двух одинаковых лайков не дает 500
+    inserted = await mark_posts(db, Like.__table__, current_user.id, [like.post_id])
+    if not inserted:
+        # Ничего не вставилось - выясняем почему, это редкий путь
+        if await db.scalar(select(Post.id).where(Post.id == like.post_id)) is None:
+            raise HTTPException(status_code=404, detail="Пост не найден")
         raise HTTPException(status_code=400, detail="Вы уже лайкнули этот пост")
+    await db.commit()
 
-    # Создаем лайк
-    new_like = Like(
-        user_id=current_user.id,
-        post_id=like.post_id
-    )
-
-    db.add(new_like)
-    db.commit()
-    db.refresh(new_like)
-
+    new_like = inserted[0]
     return LikeResponse(
         id=new_like.id,
         user_id=new_like.user_id,
@@ -43,35 +98,72 @@ async def like_post(like: LikeCreate, db: Session = Depends(get_db), current_use
 
 
 @router.delete("/{post_id}")
-async def unlike_post(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    like = db.query(Like).filter(
-        Like.user_id == current_user.id,
-        Like.post_id == post_id
-    ).first()
+async def unlike_post(post_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    if like_buffer.enabled:
+        if not await like_buffer.add(db, current_user.id, post_id, False):
+            raise HTTPException(status_code=404, detail="Лайк не найден")
+        return {"message": "Лайк удален"}
 
-    if not like:
+    if not await unmark_posts(db, Like.__table__, current_user.id, [post_id]):
         raise HTTPException(status_code=404, detail="Лайк не найден")
-
-    db.delete(like)
-    db.commit()
+    await db.commit()
 
     return {"message": "Лайк удален"}
 
 
+@router.post("/bulk", response_model=BulkMarkResult)
+async def like_posts(body: PostIdsBulk, db: AsyncSession = Depends(get_db),
+                     current_user: CurrentUser = Depends(get_current_user)):
+    """Лайки на несколько постов одной транзакцией; повтор запроса ничего не меняет"""
+    if like_buffer.enabled:
+        # Через буфер, иначе запись в обход него разойдется с еще не записанными намерениями
+        result = await like_buffer.add_many(db, current_user.id, body.post_ids, True)
+        return bulk_result(body.post_ids, (post_id for post_id, changed in result.items() if changed))
+    inserted = await mark_posts(db, Like.__table__, current_user.id, body.post_ids)
+    await db.commit()
+    return bulk_result(body.post_ids, (row.post_id for row in inserted))
+
+
+@router.post("/bulk-delete", response_model=BulkMarkResult)
+async def unlike_posts(body: PostIdsBulk, db: AsyncSession = Depends(get_db),
+                       current_user: CurrentUser = Depends(get_current_user)):
+    if like_buffer.enabled:
+        result = await like_buffer.add_many(db, current_user.id, body.post_ids, False)
+        return bulk_result(body.post_ids, (post_id for post_id, changed in result.items() if changed))
+    deleted = await unmark_posts(db, Like.__table__, current_user.id, body.post_ids)
+    await db.commit()
+    return bulk_result(body.post_ids, deleted)
+
+
+@router.get("/counts", response_model=List[PostEngagement])
+async def get_likes_counts(post_ids: str, db: AsyncSession = Depends(get_db),
+                           current_user: Optional[CurrentUser] = Depends(get_current_user_optional)):
+    """Лайки и избранное сразу для нескольких постов: ?post_ids=1,2,3"""
+    try:
+        ids = [int(post_id) for post_id in post_ids.split(",") if post_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="post_ids должен быть списком чисел через запятую")
+    if len(ids) > MAX_BATCH_POST_IDS:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_BATCH_POST_IDS} постов за запрос")
+
+    engagement = await load_engagement(db, ids, current_user)
+    return [engagement[post_id] for post_id in dict.fromkeys(ids)]
+
+
 @router.get("/post/{post_id}/count")
-async def get_likes_count(post_id: int, db: Session = Depends(get_db)):
-    count = db.query(Like).filter(Like.post_id == post_id).count()
-    return {"post_id": post_id, "likes_count": count}
+async def get_likes_count(post_id: int, db: AsyncSession = Depends(get_db)):
+    count = await db.scalar(select(Post.likes_count).where(Post.id == post_id))
+    return {"post_id": post_id, "likes_count": like_buffer.adjust(post_id, count or 0, False)[0]}
 
 
 @router.get("/post/{post_id}/check")
-async def check_user_like(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    like = db.query(Like).filter(
+async def check_user_like(post_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    like = await db.scalar(select(Like).where(
         Like.user_id == current_user.id,
         Like.post_id == post_id
-    ).first()
+    ))
 
-    return {"liked": like is not None}
+    return {"liked": like_buffer.adjust(post_id, 0, like is not None, current_user.id)[1]}
 
 
 # проверка тестовая
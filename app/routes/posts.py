@@ -1,26 +1,141 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Query, HTTPException, Depends, Request, Response
+from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import select, delete, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.database import get_db
-from app.database.models import Post, User
-from app.schemas.posts import PostCreate, PostUpdate, PostResponse
-from app.routes.auth import get_current_user
+from app.database.models import Post, PostScore, TrendingState, User
+from app.schemas.posts import PostCreate, PostUpdate, PostResponse, PostSearchResult, PostBulkDelete, PostView, TrendingPost
+from app.routes.auth import CurrentUser, get_current_user, get_current_user_optional
+from app.routes.likes import load_engagement, engagement_columns
+from app.core.pagination import apply_cursor, trim_page, encode_score_cursor, decode_score_cursor, MAX_PAGE_SIZE
+from app.core.conditional import make_etag, is_conditional, is_not_modified, set_validators, not_modified
+from app.search import get_search_backend, make_snippet, terms
+from app.core.cache import page_cache
+from app.core.responses import rows_response
+from app.database.like_buffer import like_buffer
+from app.database.trending import decay_factor, STATE_ID
 
 router = APIRouter(prefix="/api/posts", tags=["posts"])
 
+# Массовое удаление идет пачками по столько постов, каждая в своей транзакции
+DELETE_BATCH_SIZE = 500
+
+
+def versions_statement(user: Optional[CurrentUser]):
+    """Все, от чего зависит ответ с постом, но без content - для дешевой сверки ETag"""
+    return select(Post.id, Post.updated_at, User.updated_at, *engagement_columns(user)) \
+        .join(User, Post.author_id == User.id)
+
+
+POST_FIELDS = ("id", "author_id", "author_login", "title", "content", "created_at", "updated_at",
+               "likes_count", "favorites_count")
+# Что можно перечислить в fields=; excerpt и truncated - только вместе с excerpt=N
+LIST_FIELDS = POST_FIELDS + ("liked_by_me", "favorited_by_me", "excerpt", "truncated")
+MAX_EXCERPT_LENGTH = 1000
+
+
+class PostFields:
+    """Параметры списков постов: fields=id,title,... и excerpt=N.
+
+    Без них отдается полный PostResponse. С excerpt content не читается из базы:
+    вместо него обрезанный в SQL excerpt и признак truncated.
+    """
+    allowed = LIST_FIELDS
+
+    def __init__(self, fields: Optional[str] = None, excerpt: Optional[int] = None):
+        if excerpt is not None and not 1 <= excerpt <= MAX_EXCERPT_LENGTH:
+            raise HTTPException(status_code=400, detail=f"excerpt должен быть от 1 до {MAX_EXCERPT_LENGTH}")
+        self.excerpt = excerpt
+        self.fields = None
+        if fields:
+            self.fields = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+            unknown = [field for field in self.fields if field not in self.allowed]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Неизвестные поля: {', '.join(unknown)}")
+            if excerpt is None and {"excerpt", "truncated"} & set(self.fields):
+                raise HTTPException(status_code=400, detail="Поля excerpt и truncated требуют параметра excerpt")
+
+    @property
+    def with_content(self) -> bool:
+        if self.fields is not None:
+            return "content" in self.fields
+        return self.excerpt is None
+
+    def key(self) -> tuple:
+        """Часть ETag: разные наборы полей - разные представления"""
+        return self.fields, self.excerpt
+
+
+class TrendingFields(PostFields):
+    """PostFields для trending: к полям ленты добавляется score"""
+    allowed = LIST_FIELDS + ("score",)
+
+
+def post_columns(user: Optional[CurrentUser], view: Optional[PostFields] = None) -> list:
+    """Колонки PostResponse для Core-запроса: пост, логин автора, счетчики и отметки"""
+    columns = [Post.id, Post.author_id, User.login.label("author_login"), Post.title]
+    if view is None or view.with_content:
+        columns.append(Post.content)
+    if view is not None and view.excerpt:
+        # Лишний символ - признак того, что текст обрезан
+        columns.append(func.substr(Post.content, 1, view.excerpt + 1).label("excerpt"))
+    return columns + [Post.created_at, Post.updated_at, *engagement_columns(user)]
+
+
+def post_row(row, view: Optional[PostFields] = None, user: Optional[CurrentUser] = None,
+             extra: Optional[dict] = None) -> dict:
+    """Строка post_columns -> dict в форме PostResponse (или только запрошенные поля).
+
+    user - тот же, что в post_columns: нужен, чтобы учесть его еще не записанные лайки.
+    extra - вычисленные эндпоинтом поля (score в trending), fields= отбирает и их.
+    """
+    data = {field: row[field] for field in POST_FIELDS if field in row}
+    data["likes_count"], data["liked_by_me"] = like_buffer.adjust(
+        row["id"], row["likes_count"], bool(row["liked"]), user.id if user else None
+    )
+    data["favorited_by_me"] = bool(row["favorited"])
+    if extra:
+        data.update(extra)
+    if view is None:
+        return data
+    if view.excerpt:
+        data["excerpt"] = row["excerpt"][:view.excerpt]
+        data["truncated"] = len(row["excerpt"]) > view.excerpt
+    if view.fields:
+        data = {field: data[field] for field in view.fields}
+    return data
+
+
+def post_version(post_id, updated_at, author_updated_at, likes_count, favorites_count, liked, favorited) -> tuple:
+    return post_id, updated_at, author_updated_at, likes_count, favorites_count, bool(liked), bool(favorited)
+
+
+def stored_version(row, user: Optional[CurrentUser]) -> tuple:
+    """post_version по значениям из базы (строка versions_statement): с учетом еще не записанных лайков"""
+    post_id, updated_at, author_updated_at, likes_count, favorites_count, liked, favorited = row
+    likes_count, liked = like_buffer.adjust(post_id, likes_count, bool(liked), user.id if user else None)
+    return post_version(post_id, updated_at, author_updated_at, likes_count, favorites_count, liked, favorited)
+
+
+def validators(versions: List[tuple], *extra):
+    """ETag и Last-Modified для набора постов (одного или страницы)"""
+    last_modified = max((moment for version in versions for moment in version[1:3] if moment), default=None)
+    return make_etag(*versions, *extra), last_modified
+
 
 @router.post("/", response_model=PostResponse)
-async def create_post(post: PostCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_post(post: PostCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     new_post = Post(
         author_id=current_user.id,
         title=post.title,
         content=post.content
     )
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    await db.commit()
+    await db.refresh(new_post)
+    get_search_backend(db).index_post(new_post)
+    page_cache.invalidate("feed", "search", f"post:{new_post.id}")
     return PostResponse(
         id=new_post.id,
         author_id=new_post.author_id,
@@ -34,33 +149,184 @@ async def create_post(post: PostCreate, db: Session = Depends(get_db), current_u
 
 @router.get("/", response_model=List[PostResponse])
 async def get_posts(
+    request: Request,
+    response: Response,
     skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: PostFields = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
+):
+    # cursor - ключевая пагинация, skip оставлен для обратной совместимости
+    def page(stmt):
+        stmt = apply_cursor(stmt, Post.created_at, Post.id, cursor)
+        return stmt.limit(limit + 1) if cursor else stmt.offset(skip).limit(limit + 1)
+
+    if is_conditional(request):
+        rows = (await db.execute(page(versions_statement(current_user)))).all()
+        etag, last_modified = validators([stored_version(row, current_user) for row in rows[:limit]],
+                                        len(rows) > limit, view.key())
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified, vary="Authorization")
+
+    # Только нужные колонки и счетчики в том же запросе, без ORM-объектов
+    rows = (await db.execute(page(
+        select(*post_columns(current_user, view), User.updated_at.label("author_updated_at"))
+        .join(User, Post.author_id == User.id)
+    ))).mappings().all()
+    has_more = len(rows) > limit
+    rows = trim_page(rows, limit, response, lambda row: (row["created_at"], row["id"]))
+
+    etag, last_modified = validators([
+        stored_version((row["id"], row["updated_at"], row["author_updated_at"], row["likes_count"],
+                        row["favorites_count"], row["liked"], row["favorited"]), current_user)
+        for row in rows
+    ], has_more, view.key())
+    set_validators(response, etag, last_modified, vary="Authorization")
+    return rows_response([post_row(row, view, current_user) for row in rows], response)
+
+
+@router.get("/trending", response_model=List[TrendingPost])
+async def get_trending_posts(
+    response: Response,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: TrendingFields = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
 ):
-    posts = db.query(Post, User.login).join(User, Post.author_id == User.id) \
-        .order_by(Post.created_at.desc()) \
-        .offset(skip).limit(limit).all()
-    return [PostResponse(
+    """Лента по убыванию затухающего счета лайков и избранного.
+
+    Счета пересчитывает фоновая задача (app.database.trending); здесь только
+    проход по индексу (score, post_id), стоимость - размер страницы.
+    """
+    epoch = await db.scalar(select(TrendingState.epoch).where(TrendingState.id == STATE_ID))
+    if epoch is None:
+        return rows_response([], response)
+
+    stmt = select(*post_columns(current_user, view), PostScore.score) \
+        .join(Post, PostScore.post_id == Post.id).join(User, Post.author_id == User.id) \
+        .order_by(PostScore.score.desc(), PostScore.post_id.desc()).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(tuple_(PostScore.score, PostScore.post_id) < tuple_(*decode_score_cursor(cursor)))
+    rows = (await db.execute(stmt)).mappings().all()
+    rows = trim_page(rows, limit, response, lambda row: (row["score"], row["id"]), encode=encode_score_cursor)
+
+    # Все счета приведены к одной эпохе, поэтому текущий счет - общий множитель
+    factor = decay_factor(epoch, datetime.utcnow())
+    return rows_response(
+        [post_row(row, view, current_user, {"score": row["score"] * factor}) for row in rows], response
+    )
+
+
+async def load_post_view(db: AsyncSession, post_id: int, user: Optional[CurrentUser] = None) -> Optional[dict]:
+    """Пост в форме PostView одним запросом: автор, счетчики и отметки user"""
+    row = (await db.execute(
+        select(*post_columns(user), User.created_at.label("author_created_at"),
+               User.updated_at.label("author_updated_at"))
+        .join(User, Post.author_id == User.id).where(Post.id == post_id)
+    )).mappings().first()
+    if row is None:
+        return None
+    view = post_row(row, user=user)
+    view["author"] = {"id": row["author_id"], "login": row["author_login"], "created_at": row["author_created_at"]}
+    view["can_edit"] = user is not None and (user.is_admin or user.id == row["author_id"])
+    view["author_updated_at"] = row["author_updated_at"]
+    return view
+
+
+@router.get("/{post_id}/view", response_model=PostView)
+async def get_post_view(post_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db),
+                        current_user: Optional[CurrentUser] = Depends(get_current_user_optional)):
+    """Страница поста за один запрос к API вместо отдельных проверок лайка и избранного"""
+    if is_conditional(request):
+        row = (await db.execute(versions_statement(current_user).where(Post.id == post_id))).first()
+        if row:
+            etag, last_modified = validators([stored_version(row, current_user)], "view",
+                                              current_user and current_user.is_admin)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified, vary="Authorization")
+
+    view = await load_post_view(db, post_id, current_user)
+    if view is None:
+        raise HTTPException(status_code=404, detail="Пост не найден")
+
+    author_updated_at = view.pop("author_updated_at")
+    etag, last_modified = validators([post_version(
+        view["id"], view["updated_at"], author_updated_at, view["likes_count"], view["favorites_count"],
+        view["liked_by_me"], view["favorited_by_me"]
+    )], "view", current_user and current_user.is_admin)
+    set_validators(response, etag, last_modified, vary="Authorization")
+    return rows_response(view, response)
+
+
+@router.get("/{post_id}", response_model=PostResponse)
+async def get_post(post_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db),
+                   current_user: Optional[CurrentUser] = Depends(get_current_user_optional)):
+    if is_conditional(request):
+        row = (await db.execute(versions_statement(current_user).where(Post.id == post_id))).first()
+        if row:
+            etag, last_modified = validators([stored_version(row, current_user)])
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified, vary="Authorization")
+
+    result = (await db.execute(
+        select(Post, User.login, User.updated_at).join(User, Post.author_id == User.id)
+        .where(Post.id == post_id)
+    )).first()
+
+    if not result:
+        raise HTTPException(status_code=404, detail="Пост не найден")
+
+    post, author_login, author_updated_at = result
+    engagement = (await load_engagement(db, [post.id], current_user))[post.id]
+    etag, last_modified = validators([post_version(
+        post.id, post.updated_at, author_updated_at, engagement.likes_count, engagement.favorites_count,
+        engagement.liked_by_me, engagement.favorited_by_me
+    )])
+    set_validators(response, etag, last_modified, vary="Authorization")
+    return PostResponse(
         id=post.id,
         author_id=post.author_id,
-        author_login=login,
+        author_login=author_login,
         title=post.title,
         content=post.content,
         created_at=post.created_at,
-        updated_at=post.updated_at
-    ) for post, login in posts]
-
+        updated_at=post.updated_at,
+        likes_count=engagement.likes_count,
+        favorites_count=engagement.favorites_count,
+        liked_by_me=engagement.liked_by_me,
+        favorited_by_me=engagement.favorited_by_me
+    )
 
-@router.get("/{post_id}", response_model=PostResponse)
-async def get_post(post_id: int, db: Session = Depends(get_db)):
-    result = db.query(Post, User.login).join(User, Post.author_id == User.id) \
-        .filter(Post.id == post_id).first()
 
+@router.put("/{post_id}", response_model=PostResponse)
+async def update_post(post_id: int, post_update: PostUpdate, db: AsyncSession = Depends(get_db),
+                      current_user: CurrentUser = Depends(get_current_user)):
+    # Пост сразу с логином автора - без отдельного запроса в users
+    result = (await db.execute(
+        select(Post, User.login).join(User, Post.author_id == User.id)
+        .where(Post.id == post_id)
+    )).first()
     if not result:
         raise HTTPException(status_code=404, detail="Пост не найден")
-
     post, author_login = result
+
+    if not current_user.is_admin and post.author_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+
+    if post_update.title is not None:
+        post.title = post_update.title
+    if post_update.content is not None:
+        post.content = post_update.content
+
+    # Все поля известны заранее, перечитывать пост после commit не нужно
+    post.updated_at = datetime.utcnow()
+    await db.commit()
+    get_search_backend(db).index_post(post)
+    page_cache.invalidate("search", f"post:{post.id}")
+
     return PostResponse(
         id=post.id,
         author_id=post.author_id,
@@ -68,108 +334,91 @@ async def get_post(post_id: int, db: Session = Depends(get_db)):
         title=post.title,
         content=post.content,
         created_at=post.created_at,
-        updated_at=post.updated_at
+        updated_at=post.updated_at,
+        likes_count=like_buffer.adjust(post.id, post.likes_count, False)[0],
+        favorites_count=post.favorites_count
     )
 
 
-@router.put("/{post_id}", response_model=PostResponse)
-async def update_post(post_id: int, post_update: PostUpdate, db: Session = Depends(get_db),
-                      current_user: User = Depends(get_current_user)):
-    try:
-        print(
-            f"🔄 UPDATE attempt: user_id={current_user.id}, login={current_user.login}, is_admin={current_user.is_admin}")
-
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
-            raise HTTPException(status_code=404, detail="Пост не найден")
-
-        print(f"📝 POST FOUND: author_id={post.author_id}, current_user_id={current_user.id}")
-        print(f"🔍 PERMISSION CHECK: author_match={post.author_id == current_user.id}, is_admin={current_user.is_admin}")
-
-        print(f"✅ UPDATE ALLOWED: {current_user.login} редактирует пост {post_id}")
-
-        if post_update.title is not None:
-            post.title = post_update.title
-        if post_update.content is not None:
-            post.content = post_update.content
-
-        post.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(post)
-
-        author = db.query(User).filter(User.id == post.author_id).first()
-
-        return PostResponse(
-            id=post.id,
-            author_id=post.author_id,
-            author_login=author.login,
-            title=post.title,
-            content=post.content,
-            created_at=post.created_at,
-            updated_at=post.updated_at
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ ERROR in update_post: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Ошибка сервера: {str(e)}")
+@router.delete("/{post_id}")
+async def delete_post(post_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    post = await db.get(Post, post_id)
+    if not post:
+        raise HTTPException(status_code=404, detail="Пост не найден")
 
+    if not current_user.is_admin and post.author_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
 
-@router.delete("/{post_id}")
-async def delete_post(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    try:
-        print(f"🔄 DELETE by {current_user.login} (admin: {current_user.is_admin})")
+    # Лайки и избранное удалит база: ON DELETE CASCADE
+    await db.execute(delete(Post).where(Post.id == post_id))
+    await db.commit()
+    get_search_backend(db).remove_post(post_id)
+    page_cache.invalidate("feed", "search", f"post:{post_id}")
+    return {"message": "Пост успешно удален"}
 
-        # Проверяем пост и права
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
-            raise HTTPException(status_code=404, detail="Пост не найден")
 
-        if not current_user.is_admin and post.author_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Недостаточно прав")
+@router.post("/bulk-delete")
+async def bulk_delete_posts(body: PostBulkDelete, db: AsyncSession = Depends(get_db),
+                            current_user: CurrentUser = Depends(get_current_user)):
+    """Удаление многих постов (только админ).
 
-        from sqlalchemy import create_engine
-        from app.core.config import settings
+    Каждая пачка - отдельная короткая транзакция, чтобы не держать блокировки
+    на время всего удаления и не раздувать одну транзакцию.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
 
-        # Создаем прямое подключение к БД в обход ORM
-        engine = create_engine(settings.DATABASE_URL)
-        with engine.connect() as direct_conn:
-            with direct_conn.begin() as trans:
-                # Удаляем ВСЕ что связано с постом
-                direct_conn.execute(text("DELETE FROM likes WHERE post_id = :post_id"), {"post_id": post_id})
-                direct_conn.execute(text("DELETE FROM favorites WHERE post_id = :post_id"), {"post_id": post_id})
-                direct_conn.execute(text("DELETE FROM posts WHERE id = :post_id"), {"post_id": post_id})
-                trans.commit()
+    post_ids = sorted(set(body.post_ids))
+    search = get_search_backend(db)
+    deleted = 0
+    for start in range(0, len(post_ids), DELETE_BATCH_SIZE):
+        batch = post_ids[start:start + DELETE_BATCH_SIZE]
+        result = await db.execute(delete(Post).where(Post.id.in_(batch)))
+        await db.commit()
+        deleted += result.rowcount
+        for post_id in batch:
+            search.remove_post(post_id)
+        page_cache.invalidate(*(f"post:{post_id}" for post_id in batch))
 
-        print(f"🎉 NUCLEAR DELETE SUCCESS: пост {post_id} уничтожен!")
-        return {"message": "Пост успешно удален"}
+    page_cache.invalidate("feed", "search")
+    return {"message": "Посты удалены", "deleted": deleted}
+
+
+async def find_posts(db: AsyncSession, q: str, skip: int, limit: int,
+                     user: Optional[CurrentUser] = None) -> List[dict]:
+    """Найденные посты dict-ами в форме PostSearchResult, самые релевантные первыми"""
+    if not q.strip():
+        return []
+
+    hits = await get_search_backend(db).search(db, q, skip, limit)
+    if not hits:
+        return []
 
-    except Exception as e:
-        print(f"❌ ERROR: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Ошибка удаления: {str(e)}")
+    rows = (await db.execute(
+        select(*post_columns(user)).join(User, Post.author_id == User.id)
+        .where(Post.id.in_([post_id for post_id, _, _ in hits]))
+    )).mappings().all()
+    posts = {row["id"]: post_row(row, user=user) for row in rows}
+    query_terms = set(terms(q))
 
+    results = []
+    for post_id, rank, snippet in hits:
+        if post_id not in posts:
+            continue
+        post = posts[post_id]
+        post["rank"] = rank
+        post["snippet"] = snippet if snippet is not None else make_snippet(post["content"], query_terms)
+        results.append(post)
+    return results
 
-@router.get("/search/", response_model=List[PostResponse])
+
+@router.get("/search/", response_model=List[PostSearchResult])
 async def search_posts(
     q: str = "",
     skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
 ):
-    if not q:
-        return []
-
-    results = db.query(Post, User.login).join(User, Post.author_id == User.id) \
-        .filter((Post.title.ilike(f"%{q}%")) | (Post.content.ilike(f"%{q}%"))) \
-        .order_by(Post.created_at.desc()) \
-        .offset(skip).limit(limit).all()
-
-    return [PostResponse(
-        id=post.id,
-        author_id=post.author_id,
-        author_login=login,
-        title=post.title,
-        content=post.content,
-        created_at=post.created_at,
-        updated_at=post.updated_at
-    ) for post, login in results]
\ No newline at end of file
+    """Полнотекстовый поиск с учетом словоформ, самые релевантные первыми"""
+    return rows_response(await find_posts(db, q, skip, limit, current_user))
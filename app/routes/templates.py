@@ -1,69 +1,175 @@
-from fastapi import APIRouter, Depends, Request
+from email.utils import parsedate_to_datetime
+from fastapi import APIRouter, Depends, Request, Response
+from typing import Optional, Union
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.database import get_db
+from app.database.like_buffer import like_buffer
 from app.database.models import Post, User
+from app.core.pagination import apply_cursor, split_page
+from app.core.cache import page_cache
+from app.core.config import settings
+from app.core.compression import negotiate, compress
+from app.core.conditional import make_etag, is_conditional, is_not_modified, set_validators, not_modified
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+# Постов на странице по умолчанию и жесткий предел на один рендер
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+# Длина превью поста в ленте
+EXCERPT_LENGTH = 200
+
+
+def page_size(per_page: int) -> int:
+    """Сколько постов рендерим за раз: не меньше 1 и не больше MAX_PAGE_SIZE"""
+    return max(1, min(per_page, MAX_PAGE_SIZE))
+
+
+# Заголовки, которые храним в кэше вместе со страницей
+CACHED_HEADERS = ("etag", "last-modified", "cache-control")
+
+
+def page_response(request: Request, entry: tuple, cache_status: str) -> HTMLResponse:
+    """Страница из записи кэша; сжатый вариант считается один раз и хранится в записи"""
+    body, headers, variants = entry
+    headers = {**headers, "X-Cache": cache_status}
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding and len(body) >= settings.COMPRESSION_MIN_SIZE:
+        if encoding not in variants:
+            variants[encoding] = compress(body, encoding)
+        body = variants[encoding]
+        headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+    return HTMLResponse(body, headers=headers)
+
+
+def cached_page(request: Request) -> Optional[Union[HTMLResponse, Response]]:
+    """Готовая страница из кэша, если есть; 304, если у клиента та же версия"""
+    cached = page_cache.get(str(request.url))
+    if cached is None:
+        return None
+    headers = cached[1]
+    if "etag" in headers:
+        last_modified = parsedate_to_datetime(headers["last-modified"]) if "last-modified" in headers else None
+        if is_not_modified(request, headers["etag"], last_modified):
+            return Response(status_code=304, headers=headers)
+    return page_response(request, cached, "HIT")
+
+
+def cache_page(request: Request, response, tags, version: int):
+    """Сохраняет отрендеренную страницу с тегами постов и авторов на ней"""
+    headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+    entry = (response.body, headers, {})
+    page_cache.set(str(request.url), entry, tags, version=version)
+    return page_response(request, entry, "MISS")
+
+
+def page_tags(posts: list, *extra: str) -> list:
+    tags = list(extra)
+    for post in posts:
+        tags += [f"post:{post['id']}", f"author:{post['author_id']}"]
+    return tags
+
+
+def render_posts(request: Request, posts: list, next_url: Optional[str], fragment: bool, **context):
+    """Целая страница или только карточки постов для подгрузки (fragment=1)"""
+    template = "posts_fragment.html" if fragment else "index.html"
+    return templates.TemplateResponse(template, {
+        "request": request, "posts": posts, "next_url": next_url, **context
+    })
+
 
 @router.get("/", response_class=HTMLResponse)
-async def read_root(request: Request, db: Session = Depends(get_db)):
-    posts_with_authors = db.query(Post, User.login).join(User, Post.author_id == User.id) \
-        .order_by(Post.created_at.desc()).all()
+async def read_root(request: Request, cursor: Optional[str] = None, per_page: int = PAGE_SIZE,
+                    fragment: bool = False, db: AsyncSession = Depends(get_db)):
+    cached = cached_page(request)
+    if cached:
+        return cached
+    version = page_cache.version
+
+    limit = page_size(per_page)
+    # Вместо полного текста берем из БД только начало для превью
+    stmt = apply_cursor(
+        select(
+            Post.id, Post.author_id, User.login, Post.title,
+            func.substr(Post.content, 1, EXCERPT_LENGTH + 1).label("excerpt"),
+            Post.created_at, Post.updated_at, Post.likes_count
+        ).join(User, Post.author_id == User.id),
+        Post.created_at, Post.id, cursor
+    )
+    rows, next_cursor = split_page((await db.execute(stmt.limit(limit + 1))).all(), limit,
+                                   lambda row: (row.created_at, row.id))
 
     posts = []
-    for post, author_login in posts_with_authors:
+    for row in rows:
         post_dict = {
-            'id': post.id,
-            'author_id': post.author_id,
-            'author_login': author_login,
-            'title': post.title,
-            'content': post.content,
-            'created_at': post.created_at,
-            'updated_at': post.updated_at
+            'id': row.id,
+            'author_id': row.author_id,
+            'author_login': row.login,
+            'title': row.title,
+            'excerpt': row.excerpt[:EXCERPT_LENGTH],
+            'truncated': len(row.excerpt) > EXCERPT_LENGTH,
+            'created_at': row.created_at,
+            'updated_at': row.updated_at,
+            'likes_count': like_buffer.adjust(row.id, row.likes_count, False)[0]
         }
         posts.append(post_dict)
 
-    return templates.TemplateResponse("index.html", {"request": request, "posts": posts})
+    next_url = None
+    if next_cursor:
+        next_url = str(request.url.remove_query_params("fragment").include_query_params(cursor=next_cursor))
+    response = render_posts(request, posts, next_url, fragment)
+    return cache_page(request, response, page_tags(posts, "feed"), version)
 
 
 @router.get("/create", response_class=HTMLResponse)
-async def create_post_page(request: Request, db: Session = Depends(get_db)):
-    users = db.query(User).all()
+async def create_post_page(request: Request, db: AsyncSession = Depends(get_db)):
+    users = (await db.scalars(select(User))).all()
     return templates.TemplateResponse("create.html", {"request": request, "users": users})
 
 
 @router.get("/posts/{post_id}", response_class=HTMLResponse)
-async def read_post(request: Request, post_id: int, db: Session = Depends(get_db)):
-
-    result = db.query(Post, User.login).join(User, Post.author_id == User.id) \
-        .filter(Post.id == post_id).first()
-
-    if not result:
-        return templates.TemplateResponse("post.html", {"request": request, "post": None, "error": "Пост не найден"})
-
-    post, author_login = result
-
-    post_data = {
-        'id': post.id,
-        'author_id': post.author_id,
-        'author_login': author_login,
-        'title': post.title,
-        'content': post.content,
-        'created_at': post.created_at,
-        'updated_at': post.updated_at
-    }
-
-    return templates.TemplateResponse("post.html", {"request": request, "post": post_data})
+async def read_post(request: Request, post_id: int, db: AsyncSession = Depends(get_db)):
+    cached = cached_page(request)
+    if cached:
+        return cached
+    version = page_cache.version
+
+    # Страница зависит только от поста и логина автора (лайки обновляет JS)
+    if is_conditional(request):
+        row = (await db.execute(
+            select(Post.updated_at, User.updated_at).join(User, Post.author_id == User.id)
+            .where(Post.id == post_id)
+        )).first()
+        if row:
+            etag, last_modified = make_etag(post_id, *row), max((moment for moment in row if moment), default=None)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified(etag, last_modified)
+
+    from app.routes.posts import load_post_view
+    post_data = await load_post_view(db, post_id)
+
+    if not post_data:
+        response = templates.TemplateResponse("post.html", {"request": request, "post": None, "error": "Пост не найден"})
+        return cache_page(request, response, [f"post:{post_id}"], version)
+
+    # Счетчики в HTML - начальные, свежие и отметки читателя страница берет из /api/posts/{id}/view
+    author_updated_at = post_data.pop("author_updated_at")
+    response = templates.TemplateResponse("post.html", {"request": request, "post": post_data})
+    set_validators(response, make_etag(post_id, post_data["updated_at"], author_updated_at),
+                   max(post_data["updated_at"], author_updated_at))
+    return cache_page(request, response, page_tags([post_data]), version)
 
 
 @router.get("/edit/{post_id}", response_class=HTMLResponse)
-async def edit_post_page(request: Request, post_id: int, db: Session = Depends(get_db)):
-    result = db.query(Post, User.login).join(User, Post.author_id == User.id) \
-        .filter(Post.id == post_id).first()
+async def edit_post_page(request: Request, post_id: int, db: AsyncSession = Depends(get_db)):
+    result = (await db.execute(
+        select(Post, User.login).join(User, Post.author_id == User.id)
+        .where(Post.id == post_id)
+    )).first()
 
     if not result:
         return templates.TemplateResponse("edit.html", {"request": request, "post": None, "error": "Пост не найден"})
@@ -98,31 +204,38 @@ async def profile_page(request: Request):
 
 
 @router.get("/search", response_class=HTMLResponse)
-async def search_page(request: Request, q: str = "", db: Session = Depends(get_db)):
+async def search_page(request: Request, q: str = "", page: int = 1, per_page: int = PAGE_SIZE,
+                      fragment: bool = False, db: AsyncSession = Depends(get_db)):
+    cached = cached_page(request)
+    if cached:
+        return cached
+    version = page_cache.version
+
+    limit = page_size(per_page)
+    page = max(page, 1)
     posts = []
+    next_url = None
 
     if q:
-        # Используем существующую функцию поиска
-        from app.routes.posts import search_posts
-        search_results = await search_posts(q=q, db=db)
+        # Используем существующую функцию поиска, лишний пост - признак следующей страницы
+        from app.routes.posts import find_posts
+        search_results = await find_posts(db, q, skip=(page - 1) * limit, limit=limit + 1)
+        if len(search_results) > limit:
+            search_results = search_results[:limit]
+            next_url = str(request.url.remove_query_params("fragment").include_query_params(page=page + 1))
         posts = [
             {
-                'id': post.id,
-                'author_id': post.author_id,
-                'author_login': post.author_login,
-                'title': post.title,
-                'content': post.content,
-                'created_at': post.created_at,
-                'updated_at': post.updated_at
+                'id': post['id'],
+                'author_id': post['author_id'],
+                'author_login': post['author_login'],
+                'title': post['title'],
+                'snippet': post['snippet'],
+                'created_at': post['created_at'],
+                'updated_at': post['updated_at'],
+                'likes_count': post['likes_count']
             }
             for post in search_results
         ]
 
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "posts": posts,
-            "search_query": q
-        }
-    )
\ No newline at end of file
+    response = render_posts(request, posts, next_url, fragment, search_query=q)
+    return cache_page(request, response, page_tags(posts, "search"), version)
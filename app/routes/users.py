@@ -1,17 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Query, HTTPException, Depends, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.database.database import get_db
-from app.database.models import User
+from app.database.models import User, Post, Like, favorites
+from app.database.counters import change_counter
 from app.schemas.users import UserCreate, UserUpdate, UserResponse
-from app.core.security import get_password_hash
-from app.routes.auth import get_current_user
+from app.schemas.posts import AuthorPosts
+from app.core.security import hash_password
+from app.routes.auth import CurrentUser, get_current_user, get_current_user_optional, forget_user
+from app.routes.posts import PostFields, post_columns, post_row
+from app.core.pagination import apply_cursor, trim_page, MAX_PAGE_SIZE
+from app.core.cache import page_cache
+from app.core.responses import rows_response
+from app.database.like_buffer import like_buffer
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+# Колонки UserResponse для списков: без hashed_password и ORM-объектов
+USER_COLUMNS = (User.id, User.email, User.login, User.is_admin, User.created_at, User.updated_at)
+
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     return UserResponse(
         id=current_user.id,
         email=current_user.email,
@@ -23,39 +34,37 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 @router.get("/", response_model=List[UserResponse])
 async def get_all_users(
+    response: Response,
     skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     # Только админ может видеть всех пользователей
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
 
-    users = db.query(User).offset(skip).limit(limit).all()
-    return [
-        UserResponse(
-            id=user.id,
-            email=user.email,
-            login=user.login,
-            is_admin=user.is_admin,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        ) for user in users
-    ]
+    # Пользователи идут в порядке регистрации
+    stmt = apply_cursor(select(*USER_COLUMNS), User.created_at, User.id, cursor, descending=False)
+    if not cursor:
+        stmt = stmt.offset(skip)
+    users = (await db.execute(stmt.limit(limit + 1))).mappings().all()
+    users = trim_page(users, limit, response, lambda user: (user["created_at"], user["id"]))
+    return rows_response([dict(user) for user in users], response)
 
 
 @router.post("/", response_model=UserResponse)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Проверяем уникальность
-    if db.query(User).filter(User.email == user.email).first():
+    if await db.scalar(select(User).where(User.email == user.email)):
         raise HTTPException(status_code=400, detail="Email уже используется")
 
-    if db.query(User).filter(User.login == user.login).first():
+    if await db.scalar(select(User).where(User.login == user.login)):
         raise HTTPException(status_code=400, detail="Логин уже используется")
 
     # Создаем пользователя
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     new_user = User(
         email=user.email,
         login=user.login,
@@ -64,8 +73,8 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return UserResponse(
         id=new_user.id,
@@ -78,8 +87,8 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
@@ -93,39 +102,87 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
     )
 
 
+@router.get("/{user_id}/posts", response_model=AuthorPosts)
+async def get_user_posts(
+    user_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: PostFields = Depends(),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[CurrentUser] = Depends(get_current_user_optional)
+):
+    """Посты автора, новые первыми, и итоги по всем его постам (для профиля).
+
+    Оба запроса идут по индексу (author_id, created_at, id), так что стоимость
+    зависит от числа постов автора, а не всего блога.
+    """
+    totals = (await db.execute(
+        select(
+            User.login,
+            func.count(Post.id),
+            func.coalesce(func.sum(Post.likes_count + like_buffer.pending_likes(Post.id)), 0),
+            func.coalesce(func.sum(Post.favorites_count), 0)
+        ).outerjoin(Post, Post.author_id == User.id).where(User.id == user_id).group_by(User.id, User.login)
+    )).first()
+    if not totals:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    login, posts_count, likes_count, favorites_count = totals
+
+    stmt = apply_cursor(
+        select(*post_columns(current_user, view)).join(User, Post.author_id == User.id)
+        .where(Post.author_id == user_id),
+        Post.created_at, Post.id, cursor
+    )
+    rows = (await db.execute(stmt.limit(limit + 1))).mappings().all()
+    rows = trim_page(rows, limit, response, lambda row: (row["created_at"], row["id"]))
+    return rows_response({
+        "author_id": user_id,
+        "author_login": login,
+        "posts_count": posts_count,
+        "likes_count": likes_count,
+        "favorites_count": favorites_count,
+        "posts": [post_row(row, view, current_user) for row in rows],
+    }, response)
+
+
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db),
-                      current_user: User = Depends(get_current_user)):
+async def update_user(user_id: int, user_update: UserUpdate, db: AsyncSession = Depends(get_db),
+                      current_user: CurrentUser = Depends(get_current_user)):
     if user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
     # Обновляем поля
     if user_update.email is not None:
         # Проверяем уникальность email
-        existing_user = db.query(User).filter(User.email == user_update.email, User.id != user_id).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_update.email, User.id != user_id))
         if existing_user:
             raise HTTPException(status_code=400, detail="Email уже используется")
         user.email = user_update.email
 
     if user_update.login is not None:
         # Проверяем уникальность логина
-        existing_user = db.query(User).filter(User.login == user_update.login, User.id != user_id).first()
+        existing_user = await db.scalar(select(User).where(User.login == user_update.login, User.id != user_id))
         if existing_user:
             raise HTTPException(status_code=400, detail="Логин уже используется")
+        if user_update.login != user.login:
+            # Логин автора виден на страницах с его постами
+            page_cache.invalidate(f"author:{user_id}")
         user.login = user_update.login
 
     if user_update.password is not None:
-        user.hashed_password = get_password_hash(user_update.password)
+        user.hashed_password = await hash_password(user_update.password)
 
     # Только админ может менять is_admin
     if user_update.is_admin is not None and current_user.is_admin:
         user.is_admin = user_update.is_admin
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    forget_user(user_id)
 
     return UserResponse(
         id=user.id,
@@ -138,12 +195,12 @@ async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depen
 
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     # Только админ может удалять пользователей
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
@@ -151,8 +208,16 @@ async def delete_user(user_id: int, db: Session = Depends(get_db), current_user:
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Нельзя удалить себя")
 
-    db.delete(user)
-    db.commit()
+    # Лайки и избранное пользователя уйдут каскадом - поправляем счетчики постов
+    await db.execute(change_counter(Post.likes_count, select(Like.post_id).where(Like.user_id == user_id), -1))
+    await db.execute(change_counter(
+        Post.favorites_count, select(favorites.c.post_id).where(favorites.c.user_id == user_id), -1
+    ))
+    await db.delete(user)
+    await db.commit()
+    forget_user(user_id)
+    like_buffer.forget_user(user_id)
+    page_cache.invalidate(f"author:{user_id}")
     return {"message": "Пользователь удален"}
 
 
@@ -160,26 +225,17 @@ async def delete_user(user_id: int, db: Session = Depends(get_db), current_user:
 async def search_users(
         q: str = "",
         skip: int = 0,
-        limit: int = 20,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+        db: AsyncSession = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Поиск пользователей по логину и email"""
     if not q:
         return []
 
-    users = db.query(User).filter(
+    users = (await db.execute(select(*USER_COLUMNS).where(
         (User.login.ilike(f"%{q}%")) |
         (User.email.ilike(f"%{q}%"))
-    ).offset(skip).limit(limit).all()
-
-    return [
-        UserResponse(
-            id=user.id,
-            email=user.email,
-            login=user.login,
-            is_admin=user.is_admin,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        ) for user in users
-    ]
\ No newline at end of file
+    ).offset(skip).limit(limit))).mappings().all()
+
+    return rows_response([dict(user) for user in users])
\ No newline at end of file
@@ -1,11 +1,27 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Optional
 
 class LikeCreate(BaseModel):
     post_id: int
 
 class LikeResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # None, пока лайк ждет записи в буфере
     user_id: int
     post_id: int
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class PostEngagement(BaseModel):
+    post_id: int
+    likes_count: int = 0
+    favorites_count: int = 0
+    liked_by_me: bool = False
+    favorited_by_me: bool = False
+
+class PostIdsBulk(BaseModel):
+    post_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+class BulkMarkResult(BaseModel):
+    """changed - где отметка поставлена/снята, unchanged - где уже была такой (или поста нет)"""
+    changed: List[int]
+    unchanged: List[int]
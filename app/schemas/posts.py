@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class PostCreate(BaseModel):
     title: str
@@ -10,6 +10,9 @@ class PostUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
 
+class PostBulkDelete(BaseModel):
+    post_ids: List[int] = Field(..., min_length=1, max_length=10000)
+
 class PostResponse(BaseModel):
     id: int
     author_id: int
@@ -17,4 +20,34 @@ class PostResponse(BaseModel):
     title: str
     content: str
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+    likes_count: int = 0
+    favorites_count: int = 0
+    liked_by_me: bool = False
+    favorited_by_me: bool = False
+
+class PostAuthor(BaseModel):
+    id: int
+    login: str
+    created_at: datetime
+
+class PostView(PostResponse):
+    """Все для страницы поста: пост, автор, счетчики и отметки читателя"""
+    author: PostAuthor
+    can_edit: bool = False
+
+class TrendingPost(PostResponse):
+    score: float  # уже с учетом затухания на момент запроса
+
+class PostSearchResult(PostResponse):
+    rank: float
+    snippet: str  # HTML: текст экранирован, найденные слова в <mark>
+
+class AuthorPosts(BaseModel):
+    """Страница постов автора и итоги по всем его постам"""
+    author_id: int
+    author_login: str
+    posts_count: int
+    likes_count: int
+    favorites_count: int
+    posts: List[PostResponse]
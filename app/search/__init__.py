@@ -0,0 +1,18 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.search.memory import MemorySearchBackend
+from app.search.postgres import PostgresSearchBackend
+from app.search.text import make_snippet, terms
+
+postgres_backend = PostgresSearchBackend()
+memory_backend = MemorySearchBackend()
+
+
+def get_search_backend(db: AsyncSession):
+    """Postgres ищет сам, для остальных БД (SQLite) - индекс в памяти"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgres_backend
+    return memory_backend
+
+
+__all__ = ["get_search_backend", "make_snippet", "terms", "memory_backend", "postgres_backend"]
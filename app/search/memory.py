@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Post
+from app.search.text import terms
+
+# Слова заголовка весят больше слов текста
+TITLE_WEIGHT = 3
+
+# Параметры BM25
+K1 = 1.2
+B = 0.75
+
+
+class InvertedIndex:
+    """Обратный индекс "терм -> {post_id: частота}" с ранжированием BM25"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self.doc_length: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_length)
+
+    def add(self, post_id: int, title: str, content: str):
+        self.remove(post_id)
+        frequencies = Counter(terms(content))
+        for term in terms(title):
+            frequencies[term] += TITLE_WEIGHT
+
+        for term, frequency in frequencies.items():
+            self.postings[term][post_id] = frequency
+        self.doc_terms[post_id] = tuple(frequencies)
+        self.doc_length[post_id] = sum(frequencies.values())
+        self.total_length += self.doc_length[post_id]
+
+    def remove(self, post_id: int):
+        for term in self.doc_terms.pop(post_id, ()):
+            postings = self.postings[term]
+            postings.pop(post_id, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.doc_length.pop(post_id, 0)
+
+    def search(self, query: str, skip: int = 0, limit: int = 20) -> List[Tuple[int, float]]:
+        """(post_id, rank) постов, содержащих все слова запроса, лучшие первыми"""
+        query_terms = set(terms(query))
+        if not query_terms or not self.doc_length:
+            return []
+
+        # Начинаем пересечение с самого редкого терма
+        postings = sorted((self.postings.get(term, {}) for term in query_terms), key=len)
+        candidates = set(postings[0])
+        for term_postings in postings[1:]:
+            candidates.intersection_update(term_postings)
+            if not candidates:
+                return []
+
+        total = len(self.doc_length)
+        average_length = self.total_length / total
+        idf = [math.log(1 + (total - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+
+        def rank(post_id):
+            norm = K1 * (1 - B + B * self.doc_length[post_id] / average_length)
+            return sum(
+                weight * p[post_id] * (K1 + 1) / (p[post_id] + norm)
+                for weight, p in zip(idf, postings)
+            )
+
+        top = heapq.nlargest(skip + limit, ((rank(post_id), post_id) for post_id in candidates))
+        return [(post_id, score) for score, post_id in top[skip:]]
+
+
+class MemorySearchBackend:
+    """Поиск для SQLite/разработки: индекс в памяти процесса.
+
+    Строится из БД при первом поиске, дальше обновляется из create/update/delete
+    постов. Каждый процесс держит свой индекс, поэтому для нескольких воркеров
+    нужен Postgres.
+    """
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.ready = False
+        self._lock = asyncio.Lock()
+
+    def reset(self):
+        self.index = InvertedIndex()
+        self.ready = False
+
+    async def _build(self, db: AsyncSession):
+        async with self._lock:
+            if self.ready:
+                return
+            index = InvertedIndex()
+            rows = await db.stream(select(Post.id, Post.title, Post.content).execution_options(yield_per=1000))
+            async for post_id, title, content in rows:
+                index.add(post_id, title, content)
+            self.index, self.ready = index, True
+
+    async def search(self, db: AsyncSession, query: str, skip: int, limit: int):
+        if not self.ready:
+            await self._build(db)
+        return [(post_id, rank, None) for post_id, rank in self.index.search(query, skip, limit)]
+
+    def index_post(self, post: Post):
+        if self.ready:
+            self.index.add(post.id, post.title, post.content)
+
+    def remove_post(self, post_id: int):
+        if self.ready:
+            self.index.remove(post_id)
@@ -0,0 +1,37 @@
+import html
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Post, post_search_vector, SEARCH_CONFIG
+
+# Маркеры подсветки из ts_headline, заменяются на <mark> после экранирования
+START_SEL, STOP_SEL = "\x02", "\x03"
+HEADLINE_OPTIONS = f'StartSel="{START_SEL}", StopSel="{STOP_SEL}", MaxWords=30, MinWords=10, MaxFragments=2'
+
+
+class PostgresSearchBackend:
+    """Полнотекстовый поиск Postgres: tsvector по GIN-индексу ix_posts_search"""
+
+    async def search(self, db: AsyncSession, query: str, skip: int, limit: int):
+        ts_query = func.websearch_to_tsquery(literal_column(SEARCH_CONFIG), query)
+        vector = post_search_vector(Post.title, Post.content)
+        rank = func.ts_rank_cd(vector, ts_query)
+
+        stmt = select(
+            Post.id,
+            rank,
+            func.ts_headline(literal_column(SEARCH_CONFIG), Post.content, ts_query, HEADLINE_OPTIONS)
+        ).where(vector.op("@@")(ts_query)).order_by(rank.desc(), Post.id.desc()).offset(skip).limit(limit)
+
+        return [
+            (post_id, score, html.escape(headline).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>"))
+            for post_id, score, headline in (await db.execute(stmt)).all()
+        ]
+
+    # tsvector считается из самой строки, поддерживать отдельно ничего не нужно
+    def index_post(self, post: Post):
+        pass
+
+    def remove_post(self, post_id: int):
+        pass
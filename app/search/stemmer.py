@@ -0,0 +1,98 @@
+"""
+Стеммер для русского языка по алгоритму Snowball (Портер):
+"селедка", "селедки", "селедкой" -> "селедк".
+"""
+
+VOWELS = "аеиоуыэюя"
+
+
+def _endings(group1="", group2=""):
+    """Окончания группы 1 допустимы только после "а"/"я", группы 2 - всегда.
+    Сортируем по длине, чтобы первым находилось самое длинное."""
+    endings = [(ending, True) for ending in group1.split()] + [(ending, False) for ending in group2.split()]
+    return sorted(endings, key=lambda item: len(item[0]), reverse=True)
+
+
+PERFECTIVE_GERUND = _endings("в вши вшись", "ив ивши ившись ыв ывши ывшись")
+ADJECTIVE = _endings("", "ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому их ых ую юю ая яя ою ею")
+PARTICIPLE = _endings("ем нн вш ющ щ", "ивш ывш ующ")
+REFLEXIVE = _endings("", "ся сь")
+VERB = _endings(
+    "ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно",
+    "ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло ено ят ует уют ит ыт ены ить ыть ишь ую ю"
+)
+NOUN = _endings("", "а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем ам ом о у ах иях ях ы ь ию ью ю ия ья я")
+SUPERLATIVE = _endings("", "ейш ейше")
+DERIVATIONAL = _endings("", "ост ость")
+
+
+def _cut(region, endings):
+    """Отрезает самое длинное подходящее окончание, None - если ничего не подошло"""
+    for ending, after_a_ya in endings:
+        if region.endswith(ending):
+            rest = region[:-len(ending)]
+            if after_a_ya and (not rest or rest[-1] not in "ая"):
+                continue
+            return rest
+    return None
+
+
+def _after_vowel_consonant(word, start):
+    """Позиция после первой пары "гласная + согласная", начиная со start"""
+    for i in range(max(start, 1), len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word: str) -> str:
+    word = word.lower().replace("ё", "е")
+
+    # RV - часть слова после первой гласной, R2 - область для словообразовательных суффиксов
+    rv = next((i + 1 for i, ch in enumerate(word) if ch in VOWELS), len(word))
+    if rv >= len(word):
+        return word
+    r2 = _after_vowel_consonant(word, _after_vowel_consonant(word, 0))
+    prefix, region = word[:rv], word[rv:]
+
+    # Шаг 1: деепричастие, иначе возвратность + прилагательное/глагол/существительное
+    result = _cut(region, PERFECTIVE_GERUND)
+    if result is None:
+        without_reflexive = _cut(region, REFLEXIVE)
+        if without_reflexive is not None:
+            region = without_reflexive
+        result = _cut(region, ADJECTIVE)
+        if result is not None:
+            participle = _cut(result, PARTICIPLE)
+            if participle is not None:
+                result = participle
+        if result is None:
+            result = _cut(region, VERB)
+        if result is None:
+            result = _cut(region, NOUN)
+    if result is not None:
+        region = result
+
+    # Шаг 2
+    if region.endswith("и"):
+        region = region[:-1]
+
+    # Шаг 3: словообразовательный суффикс только внутри R2
+    r2_start = max(r2 - rv, 0)
+    if r2_start < len(region):
+        derivational = _cut(region[r2_start:], DERIVATIONAL)
+        if derivational is not None:
+            region = region[:r2_start] + derivational
+
+    # Шаг 4
+    superlative = _cut(region, SUPERLATIVE)
+    if superlative is not None:
+        region = superlative
+        if region.endswith("нн"):
+            region = region[:-1]
+    elif region.endswith("нн"):
+        region = region[:-1]
+    elif region.endswith("ь"):
+        region = region[:-1]
+
+    return prefix + region
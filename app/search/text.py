@@ -0,0 +1,67 @@
+import html
+import re
+from functools import lru_cache
+from typing import Iterator, List, Set, Tuple
+
+from app.search.stemmer import stem
+
+WORD_RE = re.compile(r"\w+")
+
+# Сколько символов текста показываем в сниппете
+SNIPPET_LENGTH = 160
+
+# Служебные слова не индексируем (как словарь russian в Postgres)
+STOP_WORDS = frozenset(
+    "и в во не что он на я с со как а то все она так его но да ты к у же вы за бы по только "
+    "ее мне было вот от меня еще нет о из ему теперь когда даже ну ли если уже или ни быть был "
+    "до вас нибудь опять уж вам ведь там потом себя ничего ей может они тут где есть надо ней "
+    "для мы тебя их чем была сам чтоб без будто чего раз тоже себе под будет ж тогда кто этот "
+    "того потому этого какой совсем ним здесь этом один почти мой тем чтобы нее были куда зачем "
+    "всех никогда можно при наконец два об другой хоть после над больше тот через эти нас про "
+    "всего них какая много разве три эту моя впрочем хорошо свою этой перед иногда лучше чуть "
+    "том нельзя такой им более всегда конечно всю между".split()
+)
+
+
+@lru_cache(maxsize=200_000)
+def normalize(word: str) -> str:
+    """Приводит слово к терму индекса: нижний регистр, ё -> е, основа для кириллицы"""
+    word = word.lower().replace("ё", "е")
+    if "а" <= word[0] <= "я":
+        return stem(word)
+    return word
+
+
+def iter_terms(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Термы текста вместе с позициями исходных слов, без служебных слов"""
+    for match in WORD_RE.finditer(text):
+        word = match.group().lower()
+        if word not in STOP_WORDS:
+            yield normalize(word), match.start(), match.end()
+
+
+def terms(text: str) -> List[str]:
+    return [term for term, _, _ in iter_terms(text)]
+
+
+def make_snippet(text: str, query_terms: Set[str], length: int = SNIPPET_LENGTH) -> str:
+    """Кусок текста вокруг первого совпадения, найденные слова обернуты в <mark>.
+
+    Текст экранируется, так что результат можно вставлять как HTML.
+    """
+    matches = [(start, end) for term, start, end in iter_terms(text) if term in query_terms]
+    window_start = max(matches[0][0] - length // 4, 0) if matches else 0
+    window_end = min(window_start + length, len(text))
+
+    parts = ["..."] if window_start > 0 else []
+    position = window_start
+    for start, end in matches:
+        if start < window_start or end > window_end:
+            continue
+        parts.append(html.escape(text[position:start]))
+        parts.append(f"<mark>{html.escape(text[start:end])}</mark>")
+        position = end
+    parts.append(html.escape(text[position:window_end]))
+    if window_end < len(text):
+        parts.append("...")
+    return "".join(parts)
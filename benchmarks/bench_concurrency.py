@@ -0,0 +1,96 @@
+"""
+Нагрузочный замер: пропускная способность API при большом числе
+одновременных клиентов.
+
+Запуск:
+    python benchmarks/bench_concurrency.py --clients 100 --requests 3000
+
+По умолчанию поднимает временную SQLite базу; чтобы мерить на Postgres,
+передайте DATABASE_URL (синхронный, как для alembic).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замер пропускной способности под конкурентной нагрузкой")
+    parser.add_argument("--clients", type=int, default=100, help="число одновременных клиентов")
+    parser.add_argument("--requests", type=int, default=3000, help="всего запросов")
+    parser.add_argument("--posts", type=int, default=500, help="сколько постов засеять")
+    return parser.parse_args()
+
+
+def seed(database_url: str, posts_count: int):
+    """Создает таблицы и заполняет их тестовыми данными"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.database.models import Base, User, Post
+
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        author = User(email="bench@example.com", login="bench", hashed_password="x")
+        session.add(author)
+        session.flush()
+        session.add_all([
+            Post(author_id=author.id, title=f"Селедка №{i}", content="Рецепт селедки. " * 50)
+            for i in range(posts_count)
+        ])
+        session.commit()
+    engine.dispose()
+
+
+async def run(clients: int, total: int, posts_count: int):
+    import httpx
+    from main import app
+
+    latencies = []
+    counter = iter(range(total))
+
+    async def worker(http):
+        for i in counter:
+            path = "/api/posts/" if i % 2 else f"/api/posts/{i % posts_count + 1}"
+            started = time.perf_counter()
+            response = await http.get(path)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"клиентов: {clients}, запросов: {len(latencies)}, время: {elapsed:.2f} с")
+    print(f"пропускная способность: {len(latencies) / elapsed:.1f} req/s")
+    print(f"p50: {statistics.median(latencies) * 1000:.1f} мс, "
+          f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс")
+
+
+def main():
+    args = parse_args()
+    tmp_path = None
+    if "DATABASE_URL" not in os.environ:
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}"
+
+    try:
+        seed(os.environ["DATABASE_URL"], args.posts)
+        asyncio.run(run(args.clients, args.requests, args.posts))
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
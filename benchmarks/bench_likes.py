@@ -0,0 +1,122 @@
+"""
+Замер лайков горячего поста: синхронная запись (коммит на каждый лайк)
+против отложенной записи через буфер (LIKE_BUFFER_*).
+
+Каждый клиент - свой пользователь, все лайкают и снимают лайк с одного поста.
+Время буфера включает дозапись очереди при остановке.
+
+Запуск:
+    python benchmarks/bench_likes.py --clients 1,16,64 --events 2000
+
+По умолчанию поднимает временную SQLite базу; чтобы мерить на Postgres,
+передайте DATABASE_URL.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замер лайков: синхронно против буфера")
+    parser.add_argument("--clients", default="1,16,64", help="уровни конкурентности через запятую")
+    parser.add_argument("--events", type=int, default=2000, help="лайков и анлайков на каждый уровень")
+    return parser.parse_args()
+
+
+def seed(database_url: str, users_count: int) -> int:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.database.models import Base, User, Post
+
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            User(id=i, email=f"bench{i}@example.com", login=f"bench{i}", hashed_password="x")
+            for i in range(1, users_count + 1)
+        ])
+        post = Post(author_id=1, title="Горячая селедка", content="Рецепт")
+        session.add(post)
+        session.commit()
+        post_id = post.id
+    engine.dispose()
+    return post_id
+
+
+async def measure(http, mode: str, clients: int, total: int, post_id: int):
+    from app.core.security import create_access_token
+    from app.database.like_buffer import like_buffer
+
+    latencies = []
+    counter = iter(range(total))
+
+    async def worker(user_id: int):
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+        liked = False
+        for _ in counter:
+            started = time.perf_counter()
+            if liked:
+                response = await http.delete(f"/api/likes/{post_id}", headers=headers)
+            else:
+                response = await http.post("/api/likes/", json={"post_id": post_id}, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+            liked = not liked
+
+    like_buffer.enabled = mode == "buffer"
+    if like_buffer.enabled:
+        like_buffer.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user_id) for user_id in range(1, clients + 1)))
+    await like_buffer.stop()
+    elapsed = time.perf_counter() - started
+
+    # Оставшиеся лайки снимаем синхронно, чтобы следующий замер начинался с нуля
+    like_buffer.enabled = False
+    for user_id in range(1, clients + 1):
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+        await http.delete(f"/api/likes/{post_id}", headers=headers)
+
+    latencies.sort()
+    print(f"{mode:>8} {clients:>8} {len(latencies) / elapsed:>10.1f} {statistics.median(latencies) * 1000:>9.2f} "
+          f"{latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000:>9.2f} {like_buffer.batches:>8}")
+
+
+async def run(levels, total: int, post_id: int):
+    import httpx
+    from main import app
+
+    print(f"{'режим':>8} {'клиентов':>8} {'лайков/с':>10} {'p50, мс':>9} {'p95, мс':>9} {'пачек':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        for clients in levels:
+            for mode in ("sync", "buffer"):
+                await measure(http, mode, clients, total, post_id)
+
+
+def main():
+    args = parse_args()
+    tmp_path = None
+    if "DATABASE_URL" not in os.environ:
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}"
+
+    try:
+        levels = [int(level) for level in args.clients.split(",")]
+        post_id = seed(os.environ["DATABASE_URL"], max(levels))
+        asyncio.run(run(levels, args.events, post_id))
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
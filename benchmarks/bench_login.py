@@ -0,0 +1,123 @@
+"""
+Замер входа: пропускная способность /auth/login в зависимости от числа
+одновременных клиентов и задержка /health, пока идут входы (показывает,
+блокирует ли хеширование цикл событий).
+
+Запуск:
+    python benchmarks/bench_login.py --clients 1,4,16,64 --logins 200
+
+Стоимость bcrypt и размер пула берутся из BCRYPT_ROUNDS,
+PASSWORD_HASH_WORKERS и PASSWORD_HASH_QUEUE. По умолчанию поднимает
+временную SQLite базу; чтобы мерить на Postgres, передайте DATABASE_URL.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = "benchpass123"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замер входа под конкурентной нагрузкой")
+    parser.add_argument("--clients", default="1,4,16,64", help="уровни конкурентности через запятую")
+    parser.add_argument("--logins", type=int, default=200, help="входов на каждый уровень")
+    parser.add_argument("--users", type=int, default=50, help="сколько пользователей засеять")
+    return parser.parse_args()
+
+
+def seed(database_url: str, users_count: int):
+    """Создает пользователей с одинаковым паролем (хеш считаем один раз)"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.database.models import Base, User
+    from app.core.security import get_password_hash
+
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    hashed = get_password_hash(PASSWORD)
+    with Session(engine) as session:
+        session.add_all([
+            User(email=f"bench{i}@example.com", login=f"bench{i}", hashed_password=hashed)
+            for i in range(users_count)
+        ])
+        session.commit()
+    engine.dispose()
+
+
+def percentile(values, share):
+    return values[max(int(len(values) * share) - 1, 0)] * 1000
+
+
+async def measure(http, clients: int, total: int, users_count: int):
+    latencies = []
+    probes = []
+    counter = iter(range(total))
+    done = asyncio.Event()
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            response = await http.post("/auth/login", data={"username": f"bench{i % users_count}", "password": PASSWORD})
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await http.get("/health")
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.ensure_future(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    latencies.sort()
+    probes.sort()
+    print(f"{clients:>8} {len(latencies) / elapsed:>10.1f} {statistics.median(latencies) * 1000:>9.1f} "
+          f"{percentile(latencies, 0.95):>9.1f} {percentile(probes, 0.99):>14.1f}")
+
+
+async def run(levels, total: int, users_count: int):
+    import httpx
+    from main import app
+    from app.core.config import settings
+
+    print(f"bcrypt rounds: {settings.BCRYPT_ROUNDS}, потоков: {settings.PASSWORD_HASH_WORKERS}, "
+          f"очередь: {settings.PASSWORD_HASH_QUEUE}")
+    print(f"{'клиентов':>8} {'входов/с':>10} {'p50, мс':>9} {'p95, мс':>9} {'/health p99':>14}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        for clients in levels:
+            await measure(http, clients, total, users_count)
+
+
+def main():
+    args = parse_args()
+    tmp_path = None
+    if "DATABASE_URL" not in os.environ:
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}"
+
+    try:
+        seed(os.environ["DATABASE_URL"], args.users)
+        levels = [int(level) for level in args.clients.split(",")]
+        asyncio.run(run(levels, args.logins, args.users))
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Нагрузочный прогон всех маршрутов приложения: засевает базу нужного
+размера, гоняет каждый эндпоинт конкурентными клиентами через ASGI и
+печатает p50/p95/p99 и req/s. Результат можно сохранить в JSON и сравнить
+с сохраненным ранее базовым прогоном.
+
+Запуск:
+    python benchmarks/bench_routes.py --output benchmarks/results.json
+    python benchmarks/bench_routes.py --baseline benchmarks/results.json --threshold 0.2
+    python benchmarks/bench_routes.py --only posts --clients 50
+
+При регрессии (p95 выросла или req/s упали больше чем на threshold)
+завершается с кодом 1. По умолчанию поднимает временную SQLite базу;
+чтобы мерить на Postgres, передайте DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = "benchpass123"
+WORDS = "селедка сельдь картошка лук свекла шуба рецепт маринованная соленая праздник бабушка укроп".split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замер всех маршрутов под конкурентной нагрузкой")
+    parser.add_argument("--users", type=int, default=200, help="сколько пользователей засеять")
+    parser.add_argument("--posts", type=int, default=5000, help="сколько постов засеять")
+    parser.add_argument("--likes", type=int, default=20000, help="сколько лайков засеять")
+    parser.add_argument("--favorites", type=int, default=5000, help="сколько добавлений в избранное засеять")
+    parser.add_argument("--clients", type=int, default=20, help="одновременных клиентов")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на каждый маршрут")
+    parser.add_argument("--only", default="", help="мерить только маршруты, в имени которых есть эта строка")
+    parser.add_argument("--seed", type=int, default=42, help="seed генератора данных")
+    parser.add_argument("--output", help="куда сохранить результаты (JSON)")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое ухудшение, доля")
+    return parser.parse_args()
+
+
+def seed(database_url: str, args):
+    """Заполняет базу; первый пользователь (админ) - тот, от чьего имени идут запросы"""
+    from sqlalchemy import create_engine, insert
+    from app.database.models import Base, User, Post, Like, favorites
+    from app.core.security import get_password_hash
+
+    rnd = random.Random(args.seed)
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    hashed = get_password_hash(PASSWORD)
+    users = [
+        {"id": i, "email": f"user{i}@example.com", "login": f"user{i}", "hashed_password": hashed, "is_admin": i == 1}
+        for i in range(1, args.users + 1)
+    ]
+    # Лайки и избранное - уникальные пары; у первого пользователя их нет,
+    # чтобы сценарии лайка/снятия лайка не упирались в уже существующие
+    likes = {(rnd.randint(2, args.users), rnd.randint(1, args.posts)) for _ in range(args.likes)}
+    favorite_pairs = {(rnd.randint(2, args.users), rnd.randint(1, args.posts)) for _ in range(args.favorites)}
+    likes_count, favorites_count = {}, {}
+    for _, post_id in likes:
+        likes_count[post_id] = likes_count.get(post_id, 0) + 1
+    for _, post_id in favorite_pairs:
+        favorites_count[post_id] = favorites_count.get(post_id, 0) + 1
+
+    base = datetime(2025, 1, 1)
+    posts = [
+        {
+            "id": i,
+            # Каждый десятый пост - первого пользователя (для правки и удаления)
+            "author_id": 1 if i % 10 == 0 else rnd.randint(2, args.users),
+            "title": " ".join(rnd.choices(WORDS, k=3)).capitalize(),
+            "content": " ".join(rnd.choices(WORDS, k=80)),
+            "created_at": base + timedelta(minutes=i),
+            "updated_at": base + timedelta(minutes=i),
+            "likes_count": likes_count.get(i, 0),
+            "favorites_count": favorites_count.get(i, 0),
+        }
+        for i in range(1, args.posts + 1)
+    ]
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), users)
+        for start in range(0, len(posts), 5000):
+            conn.execute(insert(Post), posts[start:start + 5000])
+        if likes:
+            conn.execute(insert(Like), [{"user_id": u, "post_id": p} for u, p in likes])
+        if favorite_pairs:
+            conn.execute(favorites.insert(), [{"user_id": u, "post_id": p} for u, p in favorite_pairs])
+    engine.dispose()
+
+
+def make_scenarios(args):
+    """(имя, метод, функция i -> (путь, параметры запроса), нужен ли токен).
+
+    Порядок важен: сценарии, меняющие данные, идут парами (лайк -> снятие лайка,
+    создание пользователя -> его удаление), удаление постов - в самом конце.
+    """
+    own_posts = [i for i in range(10, args.posts + 1, 10)]
+
+    def post_id(i):
+        return i % args.posts + 1
+
+    def own_post(i):
+        return own_posts[i % len(own_posts)]
+
+    def user_id(i):
+        return i % args.users + 1
+
+    def created_user(i):
+        # POST /api/users/ идет первым из создающих пользователей: его записи
+        # получают id сразу после засеянных, их и удаляет следующий сценарий
+        return args.users + 1 + i
+
+    def bulk_ids(i):
+        # Одни и те же 20 постов у bulk и bulk-delete: отметки ставятся и снимаются
+        return [post_id(i * 20 + k) for k in range(20)]
+
+    return [
+        # Посты
+        ("GET /api/posts/", "GET", lambda i: ("/api/posts/", {}), False),
+        ("GET /api/posts/ (с токеном)", "GET", lambda i: ("/api/posts/", {"params": {"limit": 20, "skip": i % 200}}), True),
+        ("GET /api/posts/{post_id}", "GET", lambda i: (f"/api/posts/{post_id(i)}", {}), False),
+        ("GET /api/posts/{post_id}/view", "GET", lambda i: (f"/api/posts/{post_id(i)}/view", {}), True),
+        ("GET /api/posts/trending", "GET", lambda i: ("/api/posts/trending", {}), False),
+        ("GET /api/posts/search/", "GET", lambda i: ("/api/posts/search/", {"params": {"q": WORDS[i % len(WORDS)]}}), False),
+        ("POST /api/posts/", "POST", lambda i: ("/api/posts/", {"json": {"title": f"Бенч {i}", "content": "селедка " * 50}}), True),
+        ("PUT /api/posts/{post_id}", "PUT", lambda i: (f"/api/posts/{own_post(i)}", {"json": {"title": f"Правка {i}"}}), True),
+        # Лайки
+        ("POST /api/likes/", "POST", lambda i: ("/api/likes/", {"json": {"post_id": post_id(i)}}), True),
+        ("DELETE /api/likes/{post_id}", "DELETE", lambda i: (f"/api/likes/{post_id(i)}", {}), True),
+        ("POST /api/likes/bulk", "POST", lambda i: ("/api/likes/bulk", {"json": {"post_ids": bulk_ids(i)}}), True),
+        ("POST /api/likes/bulk-delete", "POST", lambda i: ("/api/likes/bulk-delete", {"json": {
+            "post_ids": bulk_ids(i)}}), True),
+        ("GET /api/likes/counts", "GET", lambda i: ("/api/likes/counts", {"params": {
+            "post_ids": ",".join(str(post_id(i + k)) for k in range(20))}}), True),
+        ("GET /api/likes/test", "GET", lambda i: ("/api/likes/test", {}), False),
+        ("GET /api/likes/post/{post_id}/count", "GET", lambda i: (f"/api/likes/post/{post_id(i)}/count", {}), False),
+        ("GET /api/likes/post/{post_id}/check", "GET", lambda i: (f"/api/likes/post/{post_id(i)}/check", {}), True),
+        # Избранное
+        ("POST /api/favorites/{post_id}", "POST", lambda i: (f"/api/favorites/{post_id(i)}", {}), True),
+        ("GET /api/favorites/", "GET", lambda i: ("/api/favorites/", {"params": {"limit": 20}}), True),
+        ("GET /api/favorites/check/{post_id}", "GET", lambda i: (f"/api/favorites/check/{post_id(i)}", {}), True),
+        ("DELETE /api/favorites/{post_id}", "DELETE", lambda i: (f"/api/favorites/{post_id(i)}", {}), True),
+        ("POST /api/favorites/bulk", "POST", lambda i: ("/api/favorites/bulk", {"json": {
+            "post_ids": bulk_ids(i)}}), True),
+        ("POST /api/favorites/bulk-delete", "POST", lambda i: ("/api/favorites/bulk-delete", {"json": {
+            "post_ids": bulk_ids(i)}}), True),
+        # Пользователи и вход
+        ("GET /api/users/me", "GET", lambda i: ("/api/users/me", {}), True),
+        ("GET /api/users/", "GET", lambda i: ("/api/users/", {}), True),
+        ("GET /api/users/{user_id}", "GET", lambda i: (f"/api/users/{user_id(i)}", {}), False),
+        ("GET /api/users/{user_id}/posts", "GET", lambda i: (f"/api/users/{user_id(i)}/posts", {}), False),
+        ("GET /api/users/search/", "GET", lambda i: ("/api/users/search/", {"params": {"q": f"user{i % 100}"}}), True),
+        ("POST /api/users/", "POST", lambda i: ("/api/users/", {"json": {
+            "login": f"created{i}", "email": f"created{i}@example.com", "password": PASSWORD}}), False),
+        ("DELETE /api/users/{user_id}", "DELETE", lambda i: (f"/api/users/{created_user(i)}", {}), True),
+        ("PUT /api/users/{user_id}", "PUT", lambda i: ("/api/users/1", {"json": {"email": f"user1+{i}@example.com"}}), True),
+        ("GET /auth/me", "GET", lambda i: ("/auth/me", {}), True),
+        ("POST /auth/login", "POST", lambda i: ("/auth/login", {"data": {
+            "username": f"user{user_id(i)}", "password": PASSWORD}}), False),
+        ("POST /auth/register", "POST", lambda i: ("/auth/register", {"json": {
+            "login": f"bench{i}", "email": f"bench{i}@example.com", "password": PASSWORD}}), False),
+        # HTML
+        ("GET /", "GET", lambda i: ("/", {}), False),
+        ("GET /posts/{post_id}", "GET", lambda i: (f"/posts/{post_id(i)}", {}), False),
+        ("GET /search", "GET", lambda i: ("/search", {"params": {"q": WORDS[i % len(WORDS)]}}), False),
+        ("GET /edit/{post_id}", "GET", lambda i: (f"/edit/{own_post(i)}", {}), False),
+        ("GET /create", "GET", lambda i: ("/create", {}), False),
+        ("GET /profile", "GET", lambda i: ("/profile", {}), False),
+        ("GET /login", "GET", lambda i: ("/login", {}), False),
+        ("GET /register", "GET", lambda i: ("/register", {}), False),
+        # Служебные (токен бенча - админский)
+        ("GET /health", "GET", lambda i: ("/health", {}), False),
+        ("GET /health/pool", "GET", lambda i: ("/health/pool", {}), True),
+        ("GET /cache/stats", "GET", lambda i: ("/cache/stats", {}), True),
+        ("GET /metrics", "GET", lambda i: ("/metrics", {}), True),
+        # Выгрузка всех постов (админ)
+        ("GET /api/export/posts", "GET", lambda i: ("/api/export/posts", {}), True),
+        # Удаление - последним, по своим постам
+        ("DELETE /api/posts/{post_id}", "DELETE", lambda i: (f"/api/posts/{own_post(i)}", {}), True),
+        ("POST /api/posts/bulk-delete", "POST", lambda i: ("/api/posts/bulk-delete", {"json": {
+            "post_ids": [own_post(i * 10 + k) for k in range(10)]}}), True),
+    ]
+
+
+def unmeasured_routes(app, scenarios) -> list:
+    """Маршруты приложения, для которых нет сценария: новые эндпоинты не должны выпадать из замера"""
+    from fastapi.routing import APIRoute
+
+    measured = {name.split(" (")[0] for name, _, _, _ in scenarios}
+    return sorted(
+        f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods if f"{method} {route.path}" not in measured
+    )
+
+
+def percentile(values, share):
+    return values[max(int(len(values) * share + 0.5) - 1, 0)] * 1000
+
+
+async def measure(http, method, make_request, headers, clients: int, total: int):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            path, kwargs = make_request(i)
+            started = time.perf_counter()
+            response = await http.request(method, path, headers=headers, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+async def run(args):
+    import httpx
+    from main import app
+    from app.core.security import create_access_token
+    from app.database.database import engine
+    from app.database.trending import refresh_scores, SETTLE_SECONDS
+
+    # Вход и создание пользователя (bcrypt) и полная выгрузка дорогие, их меряем
+    # меньшим числом запросов; удаляется столько же пользователей, сколько создано
+    few = max(args.requests // 10, args.clients)
+    requests_for = {"POST /auth/login": few, "GET /api/export/posts": few,
+                    "POST /api/users/": few, "DELETE /api/users/{user_id}": few}
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': '1'})}"}
+    results = {}
+    scenarios = make_scenarios(args)
+
+    missing = unmeasured_routes(app, scenarios)
+    if missing:
+        print(f"Без сценария (не меряются): {', '.join(missing)}")
+    # Лента трендов читает готовые счета - считаем их по засеянным лайкам
+    await refresh_scores(engine, now=datetime.utcnow() + timedelta(seconds=SETTLE_SECONDS))
+
+    print(f"{'маршрут':<40} {'req/s':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'ошибок':>7}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        for name, method, make_request, auth in scenarios:
+            if args.only not in name:
+                continue
+            total = requests_for.get(name, args.requests)
+            result = await measure(http, method, make_request, headers if auth else {}, args.clients, total)
+            results[name] = result
+            print(f"{name:<40} {result['rps']:>8.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                  f"{result['p99_ms']:>9.2f} {result['errors']:>7}")
+    return results
+
+
+def compare(results, baseline, threshold: float) -> list:
+    """Маршруты, где p95 выросла или req/s упали сильнее threshold"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("routes", {}).get(name)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} мс")
+        if result["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: req/s {before['rps']} -> {result['rps']}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    tmp_path = None
+    if "DATABASE_URL" not in os.environ:
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}"
+
+    try:
+        seed(os.environ["DATABASE_URL"], args)
+        results = asyncio.run(run(args))
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "scale": {key: getattr(args, key) for key in ("users", "posts", "likes", "favorites", "clients", "requests")},
+        "routes": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != report["scale"]:
+            print("Внимание: базовый прогон сделан на другом масштабе данных или нагрузке")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("Регрессии:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Замер поиска: ILIKE '%q%' против полнотекстового поиска (tsvector в Postgres,
+индекс в памяти для SQLite) на синтетическом корпусе.
+
+Запуск:
+    python benchmarks/bench_search.py --posts 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "селедка селедки селедкой селедку сельдь сельди картошка картошкой картофель лук луком "
+    "свекла свеклой морковь майонез масло маслом уксус соль перец укроп зелень шуба шубой "
+    "рецепт рецепты вкусный вкусная маринованная маринованной соленая соленой подавать нарезать "
+    "почистить залить оставить холодильник ночь праздник стол бабушка классический быстрый"
+).split()
+QUERIES = ["селедка", "маринованная сельдь", "шуба свекла", "картошка с луком", "бабушкин рецепт"]
+SYLLABLES = "ба ве ги до жу за ки ло му на по ру са ти фу хо це чи ша щу".split()
+
+
+def make_vocabulary(rnd, size=20_000):
+    """Псевдослова, чтобы словарь корпуса был похож на настоящий текст"""
+    return ["".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))) for _ in range(size)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замер поиска по постам")
+    parser.add_argument("--posts", type=int, default=100_000, help="размер корпуса")
+    parser.add_argument("--words", type=int, default=60, help="слов в посте")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого запроса")
+    return parser.parse_args()
+
+
+def seed(database_url: str, posts_count: int, words: int):
+    from sqlalchemy import create_engine, insert
+    from app.database.models import Base, User, Post
+
+    rnd = random.Random(42)
+    vocabulary = make_vocabulary(rnd)
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "login": "bench", "hashed_password": "x"}])
+        for start in range(0, posts_count, 10_000):
+            conn.execute(insert(Post), [
+                {
+                    "author_id": 1,
+                    "title": " ".join(rnd.choices(WORDS, k=3)).capitalize(),
+                    "content": " ".join(
+                        rnd.choice(WORDS) if rnd.random() < 0.15 else rnd.choice(vocabulary)
+                        for _ in range(words)
+                    ),
+                }
+                for _ in range(start, min(start + 10_000, posts_count))
+            ])
+    engine.dispose()
+
+
+async def timed(coro_factory, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = await coro_factory()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+async def run(repeat: int):
+    from sqlalchemy import select
+    from app.database.database import SessionLocal
+    from app.database.models import Post
+    from app.search import get_search_backend
+
+    async with SessionLocal() as db:
+        backend = get_search_backend(db)
+        print(f"бэкенд поиска: {type(backend).__name__}")
+
+        started = time.perf_counter()
+        await backend.search(db, "прогрев", 0, 1)
+        print(f"прогрев (для индекса в памяти - построение): {time.perf_counter() - started:.2f} с")
+
+        for query in QUERIES:
+            async def ilike():
+                return (await db.execute(
+                    select(Post.id).where(Post.title.ilike(f"%{query}%") | Post.content.ilike(f"%{query}%"))
+                    .order_by(Post.created_at.desc()).limit(20)
+                )).all()
+
+            async def full_text():
+                return await backend.search(db, query, 0, 20)
+
+            ilike_ms, ilike_rows = await timed(ilike, repeat)
+            search_ms, search_rows = await timed(full_text, repeat)
+            print(f"{query!r:24} ILIKE: {ilike_ms:8.1f} мс ({len(ilike_rows)} шт.)   "
+                  f"поиск: {search_ms:8.1f} мс ({len(search_rows)} шт.)")
+
+    print(f"пиковая память процесса: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} МБ")
+
+
+def main():
+    args = parse_args()
+    tmp_path = None
+    if "DATABASE_URL" not in os.environ:
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}"
+
+    try:
+        started = time.perf_counter()
+        seed(os.environ["DATABASE_URL"], args.posts, args.words)
+        print(f"корпус: {args.posts} постов, заполнение {time.perf_counter() - started:.1f} с")
+        asyncio.run(run(args.repeat))
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
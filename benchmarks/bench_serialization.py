@@ -0,0 +1,127 @@
+"""
+Замер сериализации списков: ORM-объекты + PostResponse + стандартный путь
+FastAPI (jsonable_encoder и json) против Core-запроса с нужными колонками и
+orjson за один проход, как сейчас в эндпоинтах.
+
+Печатает строк в секунду и прирост памяти (tracemalloc) на одну страницу.
+
+Запуск:
+    python benchmarks/bench_serialization.py --posts 5000 --page 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Замер сериализации списков постов")
+    parser.add_argument("--posts", type=int, default=5000, help="постов в базе")
+    parser.add_argument("--page", type=int, default=1000, help="строк на странице")
+    parser.add_argument("--repeat", type=int, default=10, help="повторов каждого варианта")
+    return parser.parse_args()
+
+
+def seed(database_url: str, posts_count: int):
+    from sqlalchemy import create_engine, insert
+    from app.database.models import Base, User, Post
+
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "email": "bench@example.com", "login": "bench", "hashed_password": "x"}])
+        conn.execute(insert(Post), [
+            {"author_id": 1, "title": f"Селедка {i}", "content": "Селедку почистить, залить маринадом. " * 20}
+            for i in range(posts_count)
+        ])
+    engine.dispose()
+
+
+async def orm_page(db, limit: int) -> bytes:
+    """Как было: сущности в identity map, PostResponse на строку, потом response_model"""
+    from sqlalchemy import select
+    from fastapi.encoders import jsonable_encoder
+    from app.database.models import Post, User
+    from app.routes.likes import load_engagement
+    from app.schemas.posts import PostResponse
+
+    posts = (await db.execute(
+        select(Post, User.login).join(User, Post.author_id == User.id).order_by(Post.created_at.desc()).limit(limit)
+    )).all()
+    engagement = await load_engagement(db, [post.id for post, _ in posts])
+    models = [PostResponse(
+        id=post.id, author_id=post.author_id, author_login=login, title=post.title, content=post.content,
+        created_at=post.created_at, updated_at=post.updated_at,
+        likes_count=engagement[post.id].likes_count, favorites_count=engagement[post.id].favorites_count,
+    ) for post, login in posts]
+    # Повторная валидация через response_model и стандартный JSON
+    validated = [PostResponse.model_validate(model.model_dump()) for model in models]
+    body = json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode("utf-8")
+    db.expunge_all()
+    return body
+
+
+async def lean_page(db, limit: int) -> bytes:
+    """Сейчас: Core-запрос со счетчиками и orjson"""
+    from sqlalchemy import select
+    from app.database.models import Post, User
+    from app.routes.posts import post_columns, post_row
+    from app.core.responses import rows_response
+
+    rows = (await db.execute(
+        select(*post_columns(None)).join(User, Post.author_id == User.id).order_by(Post.created_at.desc()).limit(limit)
+    )).mappings().all()
+    return rows_response([post_row(row) for row in rows]).body
+
+
+async def measure(name, page_factory, db, limit: int, repeat: int):
+    await page_factory(db, limit)  # прогрев
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = await page_factory(db, limit)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    await page_factory(db, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:6} {repeat * limit / elapsed:10.0f} строк/с   {elapsed / repeat * 1000:7.1f} мс/страница   "
+          f"пик памяти {peak / 1024:8.0f} КБ/страница   тело {len(body) // 1024} КБ")
+
+
+async def run(limit: int, repeat: int):
+    from app.database.database import SessionLocal
+
+    async with SessionLocal() as db:
+        await measure("orm", orm_page, db, limit, repeat)
+        await measure("lean", lean_page, db, limit, repeat)
+
+
+def main():
+    args = parse_args()
+    tmp_path = None
+    if "DATABASE_URL" not in os.environ:
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp_path}"
+
+    try:
+        seed(os.environ["DATABASE_URL"], args.posts)
+        print(f"{args.posts} постов, страница {args.page} строк")
+        asyncio.run(run(args.page, args.repeat))
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
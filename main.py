@@ -1,11 +1,24 @@
 import threading
 import time
 import webbrowser
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession
 import uvicorn
-from app.routes import users, posts, templates, auth, likes, favorites
+from app.routes import users, posts, templates, auth, likes, favorites, export
+from app.core.cache import page_cache, user_cache
+from app.routes.auth import require_ops_access
+from app.database.database import get_db, engine, pool_status
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.compression import CompressionMiddleware, compression_stats
+from app.database.like_buffer import like_buffer
+from app.database.trending import TrendingRefresher
 
 app = FastAPI(title="Блог про селедку", description="API для ведения блога")
+# Метрики снаружи, чтобы время запроса включало сжатие
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Подключаем роутеры
 app.include_router(users.router)
@@ -14,6 +27,44 @@ app.include_router(templates.router)
 app.include_router(auth.router)
 app.include_router(likes.router)
 app.include_router(favorites.router)
+app.include_router(export.router)
+
+
+trending_refresher = TrendingRefresher(engine)
+
+
+@app.on_event("startup")
+async def start_like_buffer():
+    if like_buffer.enabled:
+        like_buffer.start()
+
+
+@app.on_event("startup")
+async def start_trending_refresher():
+    trending_refresher.start()
+
+
+@app.on_event("shutdown")
+async def stop_like_buffer():
+    """Недописанные лайки из буфера уходят в базу до остановки"""
+    await like_buffer.stop()
+
+
+@app.on_event("shutdown")
+async def stop_trending_refresher():
+    await trending_refresher.stop()
+
+
+@app.exception_handler(exc.TimeoutError)
+@app.exception_handler(exc.DBAPIError)
+async def database_unavailable(request: Request, error: Exception):
+    """Пул исчерпан или соединение с базой потеряно - это 503, а не 500.
+
+    Остальные ошибки базы (нет таблицы, блокировка, кривой SQL) - обычные 500.
+    """
+    if isinstance(error, exc.DBAPIError) and not error.connection_invalidated:
+        raise error
+    return JSONResponse(status_code=503, content={"detail": "База данных недоступна"}, headers={"Retry-After": "1"})
 
 def open_browser():
     """Открывает браузер после запуска сервера"""
@@ -27,8 +78,31 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
-    return {"status": "ok", "message": "Блог работает!"}
+async def health_check(db: AsyncSession = Depends(get_db)):
+    started = time.perf_counter()
+    await db.execute(text("SELECT 1"))
+    latency = time.perf_counter() - started
+    return {"status": "ok", "message": "Блог работает!", "db_latency_ms": round(latency * 1000, 3)}
+
+
+# Служебные эндпоинты раскрывают маршруты и нагрузку: только для сборщика метрик и админа
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_ops_access)])
+async def prometheus_metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(metrics.render() + compression_stats.render() + like_buffer.render(),
+                             media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/pool", dependencies=[Depends(require_ops_access)])
+async def pool_health():
+    """Состояние пула соединений и время ожидания соединения"""
+    return pool_status(engine)
+
+
+@app.get("/cache/stats", dependencies=[Depends(require_ops_access)])
+async def cache_stats():
+    """Статистика кэшей HTML-страниц и пользователей"""
+    return {"pages": page_cache.stats(), "users": user_cache.stats()}
 
 
 if __name__ == "__main__":
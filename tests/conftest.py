@@ -1,24 +1,57 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-from main import app
-from app.database.database import get_db
-from app.database import models
-from app.core.security import get_password_hash
-
-# Тестовая БД в памяти
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+# Дешевый bcrypt, чтобы фикстуры не тратили по 250 мс на каждый хеш
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Тренды в тестах пересчитываются явно, без фоновой задачи
+os.environ.setdefault("TRENDING_REFRESH_SECONDS", "0")
+# Настройки читаются при импорте приложения, поэтому импорты ниже - после переменных окружения
+
+from main import app  # noqa: E402
+from app.database.database import get_db, get_async_database_url, enable_sqlite_foreign_keys  # noqa: E402
+from app.database import models  # noqa: E402
+from app.core.security import get_password_hash  # noqa: E402
+from app.search import memory_backend  # noqa: E402
+from app.core.cache import page_cache, user_cache  # noqa: E402
+
+# Тестовая БД во временном файле: синхронный движок для фикстур
+# и асинхронный (aiosqlite) для приложения смотрят в один и тот же файл
+_db_fd, _db_path = tempfile.mkstemp(suffix=".sqlite3")
+os.close(_db_fd)
+SQLALCHEMY_TEST_DATABASE_URL = f"sqlite:///{_db_path}"
 
 engine = create_engine(
     SQLALCHEMY_TEST_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
+enable_sqlite_foreign_keys(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_TEST_DATABASE_URL),
+    poolclass=NullPool,
+)
+enable_sqlite_foreign_keys(async_engine)
+AsyncTestingSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if os.path.exists(_db_path):
+        os.remove(_db_path)
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -26,28 +59,27 @@ def db_session():
     # Создаем таблицы
     models.Base.metadata.create_all(bind=engine)
 
-    connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal()
 
     yield session
 
-    # Откатываем и закрываем
+    # Закрываем сессию и очищаем БД
     session.close()
-    transaction.rollback()
-    connection.close()
+    models.Base.metadata.drop_all(bind=engine)
 
 
 @pytest.fixture(scope="function")
 def client(db_session):
     """Тестовый клиент FastAPI"""
 
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
 
+    # Индекс поиска в памяти не должен переживать пересоздание БД
+    memory_backend.reset()
+    page_cache.clear()
+    user_cache.clear()
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
@@ -111,4 +143,70 @@ def test_post(db_session, test_user):
     db_session.add(post)
     db_session.commit()
     db_session.refresh(post)
-    return post
\ No newline at end of file
+    return post
+
+@pytest.fixture
+def make_posts(db_session):
+    """Создает count постов автора user: "Селедка 0", "Селедка 1", ... по минуте друг за другом
+
+        posts = make_posts(test_user, 5, content="Текст")
+    """
+    def factory(user, count, content="Рецепт селедки"):
+        base = datetime(2025, 1, 1)
+        posts = [
+            models.Post(author_id=user.id, title=f"Селедка {i}", content=content, created_at=base + timedelta(minutes=i))
+            for i in range(count)
+        ]
+        db_session.add_all(posts)
+        db_session.commit()
+        return posts
+
+    return factory
+
+
+@pytest.fixture
+def admin_user(db_session):
+    """Администратор с паролем adminpass"""
+    admin = models.User(
+        email="admin@example.com",
+        login="admin",
+        hashed_password=get_password_hash("adminpass"),
+        is_admin=True
+    )
+    db_session.add(admin)
+    db_session.commit()
+    db_session.refresh(admin)
+    return admin
+
+
+@pytest.fixture
+def admin_headers(client, admin_user):
+    """Заголовок авторизации администратора"""
+    token = client.post("/auth/login", data={"username": "admin", "password": "adminpass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def count_queries():
+    """Считает SQL-запросы внутри блока with:
+
+        with count_queries() as queries:
+            client.get("/api/posts/")
+        assert len(queries) <= 2
+
+    В списке - тексты запросов, чтобы при провале было видно, какие лишние.
+    """
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
@@ -90,4 +90,121 @@ def test_like_flow(client, auth_headers, test_post, test_user, db_session):
         assert check_response.status_code == 200
         assert check_response.json()["liked"] == True
 
-    print("✅ E2E тест лайков пройден")
\ No newline at end of file
+    print("✅ E2E тест лайков пройден")
+
+
+def test_async_database_url():
+    """Синхронные URL из настроек переводятся на асинхронные драйверы"""
+    from app.database.database import get_async_database_url
+
+    assert get_async_database_url("postgresql://u:p@localhost:5432/db") == "postgresql+asyncpg://u:p@localhost:5432/db"
+    assert get_async_database_url("sqlite:///./blog.db") == "sqlite+aiosqlite:///./blog.db"
+    assert get_async_database_url("sqlite+aiosqlite:///./blog.db") == "sqlite+aiosqlite:///./blog.db"
+
+
+def test_health_reports_database_and_pool(client, admin_headers):
+    """/health ходит в базу, /health/pool показывает состояние пула"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["db_latency_ms"] >= 0
+
+    pool = client.get("/health/pool", headers=admin_headers).json()
+    for key in ("checkedout", "checkedin", "overflow", "acquired", "timeouts", "max_wait_ms"):
+        assert key in pool
+
+
+def test_ops_endpoints_require_admin_or_metrics_token(client, auth_headers, monkeypatch):
+    """/metrics, /health/pool и /cache/stats закрыты: нужен админ или METRICS_TOKEN"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-secret")
+    for url in ("/metrics", "/health/pool", "/cache/stats"):
+        assert client.get(url).status_code == 401, url
+        assert client.get(url, headers=auth_headers).status_code == 403, url
+        assert client.get(url, headers={"Authorization": "Bearer scraper-secret"}).status_code == 200, url
+
+
+def test_pool_exhaustion_returns_503(client):
+    """Исчерпанный пул - 503, а не 500"""
+    from sqlalchemy import exc
+    from main import app
+    from app.database.database import get_db
+
+    async def exhausted_pool():
+        raise exc.TimeoutError("QueuePool limit reached")
+        yield
+
+    app.dependency_overrides[get_db] = exhausted_pool
+    response = client.get("/health")
+    assert response.status_code == 503
+
+
+def test_database_errors_other_than_unavailable_are_500(client):
+    """Ошибка в запросе (нет таблицы) - не 503, а обычная ошибка сервера"""
+    from sqlalchemy import exc
+    from main import app
+    from app.database.database import get_db
+
+    async def broken_query():
+        raise exc.OperationalError("SELECT * FROM missing", {}, Exception("no such table: missing"))
+        yield
+
+    async def lost_connection():
+        raise exc.OperationalError("SELECT 1", {}, Exception("server closed the connection"),
+                                   connection_invalidated=True)
+        yield
+
+    app.dependency_overrides[get_db] = broken_query
+    with pytest.raises(exc.OperationalError):
+        client.get("/health")
+    app.dependency_overrides[get_db] = lost_connection
+    assert client.get("/health").status_code == 503
+
+
+def test_pool_wait_measured_on_checkout(tmp_path):
+    """Ожидание пула считается при реальной выдаче соединения, сессия без запросов пул не трогает"""
+    import asyncio
+    from sqlalchemy import exc, text
+    from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+    from app.database.database import TimedQueuePool, pool_stats
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.sqlite3'}", poolclass=TimedQueuePool,
+                                     pool_size=1, max_overflow=0, pool_timeout=0.05)
+        acquired, timeouts = pool_stats.acquired, pool_stats.timeouts
+        async with AsyncSession(engine):
+            pass
+        assert pool_stats.acquired == acquired
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert pool_stats.acquired == acquired + 1
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        assert pool_stats.timeouts == timeouts + 1
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_metrics_count_requests_and_queries(client, test_post, admin_headers):
+    """/metrics отдает счетчики по шаблону маршрута и число SQL-запросов"""
+    from app.core.metrics import metrics
+
+    metrics.reset()
+    client.get(f"/api/posts/{test_post.id}")
+    client.get(f"/api/posts/{test_post.id}")
+    client.get("/no-such-page")
+
+    response = client.get("/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/api/posts/{post_id}",status="200"} 2' in body
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/posts/{post_id}"} 2' in body
+    # Пост с автором и лайки - по одному запросу, без N+1
+    queries = metrics.queries[("GET", "/api/posts/{post_id}")]
+    assert queries.count == 2
+    assert 0 < queries.total <= 2 * 3
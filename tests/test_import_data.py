@@ -0,0 +1,59 @@
+import asyncio
+import io
+import json
+
+
+def test_iter_json_records_streams_small_chunks():
+    """Потоковое чтение совпадает с json.load даже при чанках в несколько байт"""
+    from app.commands.bulk import iter_json_records
+
+    with open("blog_data.json", encoding="utf-8") as f:
+        text = f.read()
+    data = json.loads(text)
+
+    for chunk_size in (1, 7, 1 << 16):
+        records = list(iter_json_records(io.StringIO(text), chunk_size=chunk_size))
+        assert [record for key, record in records if key == "users"] == data["users"]
+        assert [record for key, record in records if key == "posts"] == data["posts"]
+        assert ("next_post_id", data["next_post_id"]) in records
+
+
+def test_import_blog_data(client, db_session):
+    """Импорт выгрузки: camelCase -> колонки, пароли хешируются, вход работает"""
+    from tests.conftest import async_engine
+    from app.commands.import_data import import_file
+    from app.database.models import User, Post
+
+    loader = asyncio.run(import_file("blog_data.json", async_engine, batch_size=2, workers=2))
+    assert loader.rows == {"users": 3, "posts": 4}
+    assert db_session.query(Post).filter(Post.author_id == 1).count() > 0
+    assert not db_session.query(User).filter(User.hashed_password == "admin123").count()
+
+    # Логин admin сам по себе прав не дает
+    response = client.post("/auth/login", data={"username": "admin", "password": "admin123"})
+    assert response.status_code == 200
+    assert not response.json()["is_admin"]
+
+
+def test_import_admin_only_when_requested():
+    """Администратор - только по isAdmin из файла или явному --admin"""
+    from app.commands.import_data import user_row
+
+    record = {"id": 1, "email": "admin@blog.com", "login": "admin", "password": "x"}
+    assert not user_row(record)["is_admin"]
+    assert user_row(record, admins={"admin"})["is_admin"]
+    assert user_row({**record, "isAdmin": True})["is_admin"]
+
+
+def test_generate_data_counters_consistent(db_session):
+    """Счетчики сгенерированных постов совпадают с лайками и избранным"""
+    from tests.conftest import async_engine
+    from app.commands.generate_data import generate
+    from app.commands.reconcile_counters import reconcile
+    from app.database.models import Like
+
+    loader = asyncio.run(generate(async_engine, users=20, posts=300, likes=1500, favorites_count=300, batch_size=64))
+    assert loader.rows["posts"] == 300
+    assert db_session.query(Like).count() == loader.rows["likes"]
+    assert 1000 < loader.rows["likes"] < 2000
+    assert asyncio.run(reconcile(async_engine)) == 0
@@ -82,4 +82,72 @@ def test_get_current_user_no_token(client):
     """Тест доступа без токена"""
     response = client.get("/auth/me")
 
-    assert response.status_code == 401  # Unauthorized
\ No newline at end of file
+    assert response.status_code == 401  # Unauthorized
+
+def test_current_user_is_cached_and_invalidated(client, db_session, test_user, auth_headers, admin_headers):
+    """Повторные запросы с тем же токеном не ходят в users, изменение пользователя сбрасывает кэш"""
+    from app.core.cache import user_cache
+
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    hits = user_cache.hits
+    assert client.get("/auth/me", headers=auth_headers).json()["login"] == "testuser"
+    assert user_cache.hits == hits + 1
+
+    response = client.put(f"/api/users/{test_user.id}", json={"login": "renamed"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=auth_headers).json()["login"] == "renamed"
+
+    stats = client.get("/cache/stats", headers=admin_headers).json()["users"]
+    assert stats["hits"] >= 1
+    assert stats["invalidations"] >= 1
+
+
+def test_deleted_user_token_rejected(client, test_user, auth_headers, admin_headers):
+    """После удаления пользователя закэшированный токен перестает работать"""
+    assert client.get("/auth/me", headers=auth_headers).status_code == 200
+    response = client.delete(f"/api/users/{test_user.id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=auth_headers).status_code == 401
+
+
+def test_login_rehashes_password_with_new_cost(client, db_session):
+    """Хеш со старой стоимостью bcrypt заменяется при успешном входе"""
+    from passlib.context import CryptContext
+    from app.database.models import User
+    from app.core.config import settings
+
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=settings.BCRYPT_ROUNDS + 1).hash("oldcost123")
+    user = User(email="old@example.com", login="oldcost", hashed_password=old_hash)
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/auth/login", data={"username": "oldcost", "password": "oldcost123"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    # С новым хешем вход по-прежнему работает
+    assert client.post("/auth/login", data={"username": "oldcost", "password": "oldcost123"}).status_code == 200
+
+
+def test_hashing_pool_rejects_overflow():
+    """Сверх лимита очереди пул сразу отвечает 503"""
+    import asyncio
+    import threading
+    from fastapi import HTTPException
+    from app.core.security import HashingPool
+
+    pool = HashingPool(workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await pool.run(release.wait)
+        assert error.value.status_code == 503
+        release.set()
+        await asyncio.gather(*blocked)
+
+    asyncio.run(scenario())
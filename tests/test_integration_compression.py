@@ -0,0 +1,76 @@
+import gzip
+
+import pytest
+
+
+# Достаточно длинный текст, чтобы ответ превысил порог сжатия
+CONTENT = "селедка под шубой " * 20
+
+
+def test_large_json_is_gzipped(client, test_user, make_posts):
+    """Большой JSON сжимается, маленький - нет"""
+    make_posts(test_user, 10, content=CONTENT)
+
+    response = client.get("/api/posts/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 10
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    plain = client.get("/api/posts/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def test_brotli_preferred(client, test_user, make_posts):
+    pytest.importorskip("brotli")
+    make_posts(test_user, 10, content=CONTENT)
+
+    response = client.get("/api/posts/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()) == 10
+    response = client.get("/api/posts/", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert response.headers["content-encoding"] == "gzip"
+
+
+def test_cached_page_compressed_once(client, test_user, make_posts):
+    """Сжатый вариант страницы хранится в кэше и не пересчитывается на попадании"""
+    from app.core.compression import compression_stats
+
+    make_posts(test_user, 10, content=CONTENT)
+    compression_stats.reset()
+
+    first = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["x-cache"] == "MISS"
+    assert first.headers["content-encoding"] == "gzip"
+    compressed = dict(compression_stats.bytes_in)
+
+    second = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert second.headers["x-cache"] == "HIT"
+    assert second.headers["content-encoding"] == "gzip"
+    assert second.text == first.text
+    assert compression_stats.bytes_in == compressed
+
+    # Клиенту без сжатия отдается исходная страница из той же записи
+    plain = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.text == first.text
+
+
+def test_gzipped_export_not_compressed_twice(client, test_user, make_posts, admin_headers):
+    make_posts(test_user, 5, content=CONTENT)
+
+    response = client.get("/api/export/posts", params={"gzip": True},
+                          headers={**admin_headers, "Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert gzip.decompress(response.content).count(b"\n") == 5
+
+
+def test_compression_metrics(client, test_user, make_posts, admin_headers):
+    make_posts(test_user, 10, content=CONTENT)
+    client.get("/api/posts/", headers={"Accept-Encoding": "gzip"})
+
+    text = client.get("/metrics", headers=admin_headers).text
+    assert 'compression_input_bytes_total{encoding="gzip"}' in text
+    assert 'compression_cpu_seconds_total{encoding="gzip"}' in text
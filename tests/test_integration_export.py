@@ -0,0 +1,44 @@
+import csv
+import gzip
+import io
+import json
+
+# Запятая и перевод строки - проверка экранирования в CSV
+CONTENT = "Рецепт, с запятой\nи переносом"
+
+
+def test_export_ndjson(client, db_session, test_user, admin_headers, make_posts, monkeypatch):
+    from app.database import export
+
+    for i, post in enumerate(make_posts(test_user, 5, content=CONTENT)):
+        post.likes_count = i
+    db_session.commit()
+    # Несколько порций с курсора
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+
+    response = client.get("/api/export/posts", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == [f"Селедка {i}" for i in range(5)]
+    assert rows[3]["author_login"] == "testuser"
+    assert rows[3]["likes_count"] == 3
+    # Даты в том же ISO-формате, что и в JSON API
+    post = client.get(f"/api/posts/{rows[0]['id']}").json()
+    assert rows[0]["created_at"] == post["created_at"]
+    assert "T" in rows[0]["created_at"]
+
+
+def test_export_csv_gzip(client, test_user, admin_headers, make_posts):
+    make_posts(test_user, 3, content=CONTENT)
+
+    response = client.get("/api/export/posts", params={"format": "csv", "gzip": True}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('.csv.gz"')
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode("utf-8"))))
+    assert len(rows) == 3
+    assert rows[0]["content"] == CONTENT
+
+
+def test_export_requires_admin(client, auth_headers):
+    assert client.get("/api/export/posts", headers=auth_headers).status_code == 403
@@ -0,0 +1,59 @@
+import pytest
+
+
+def test_favorites_flow(client, auth_headers, test_post):
+    """Добавление в избранное, проверка, список и удаление"""
+    if not auth_headers:
+        pytest.skip("No auth token available")
+
+    response = client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    assert response.status_code == 400
+
+    response = client.get(f"/api/favorites/check/{test_post.id}", headers=auth_headers)
+    assert response.json()["is_favorite"] is True
+
+    response = client.get("/api/favorites/", headers=auth_headers)
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == [test_post.id]
+
+    response = client.delete(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.delete(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_bulk_favorites(client, auth_headers, test_post):
+    response = client.post("/api/favorites/bulk", json={"post_ids": [test_post.id, 9999]}, headers=auth_headers)
+    assert response.json() == {"changed": [test_post.id], "unchanged": [9999]}
+    assert client.get(f"/api/favorites/check/{test_post.id}", headers=auth_headers).json()["is_favorite"] is True
+
+    response = client.post("/api/favorites/bulk-delete", json={"post_ids": [test_post.id]}, headers=auth_headers)
+    assert response.json() == {"changed": [test_post.id], "unchanged": []}
+    assert client.get(f"/api/posts/{test_post.id}").json()["favorites_count"] == 0
+
+    assert client.post("/api/favorites/bulk", json={"post_ids": []}, headers=auth_headers).status_code == 422
+
+
+def test_favorites_list_is_bounded(client, auth_headers, db_session, test_user):
+    """Без limit избранное отдается страницей по умолчанию, слишком большие limit отклоняются"""
+    from app.database.models import Post, favorites
+
+    db_session.add_all([Post(author_id=test_user.id, title=f"Пост {i}", content="Текст") for i in range(25)])
+    db_session.commit()
+    db_session.execute(favorites.insert(), [
+        {"user_id": test_user.id, "post_id": post.id} for post in db_session.query(Post).all()
+    ])
+    db_session.commit()
+
+    response = client.get("/api/favorites/", headers=auth_headers)
+    assert len(response.json()) == 20
+    rest = client.get("/api/favorites/", params={"cursor": response.headers["X-Next-Cursor"]}, headers=auth_headers)
+    assert len(rest.json()) == 5
+
+    assert client.get("/api/favorites/", params={"limit": 101}, headers=auth_headers).status_code == 422
+    assert client.get("/api/posts/", params={"limit": 0}).status_code == 422
+    assert client.get("/api/posts/search/", params={"q": "Пост", "limit": 1000}).status_code == 422
@@ -0,0 +1,236 @@
+import pytest
+
+
+def test_posts_list_embeds_engagement(client, auth_headers, test_post):
+    """Тест: лента сразу отдает лайки и избранное текущего пользователя"""
+    if not auth_headers:
+        pytest.skip("No auth token available")
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+
+    data = client.get("/api/posts/", headers=auth_headers).json()
+    assert data[0]["likes_count"] == 1
+    assert data[0]["liked_by_me"] is True
+    assert data[0]["favorited_by_me"] is True
+
+    # Анонимно видно только количество
+    data = client.get(f"/api/posts/{test_post.id}").json()
+    assert data["likes_count"] == 1
+    assert data["liked_by_me"] is False
+    assert data["favorited_by_me"] is False
+
+
+def test_likes_counts_bulk(client, auth_headers, test_post):
+    """Тест пакетного получения лайков для нескольких постов"""
+    if not auth_headers:
+        pytest.skip("No auth token available")
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+
+    response = client.get("/api/likes/counts", params={"post_ids": f"{test_post.id},999"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data == [
+        {"post_id": test_post.id, "likes_count": 1, "favorites_count": 0, "liked_by_me": True, "favorited_by_me": False},
+        {"post_id": 999, "likes_count": 0, "favorites_count": 0, "liked_by_me": False, "favorited_by_me": False},
+    ]
+
+
+def test_likes_counts_invalid_ids(client):
+    """Тест пакетного запроса с некорректными id"""
+    response = client.get("/api/likes/counts", params={"post_ids": "1,abc"})
+    assert response.status_code == 400
+
+    response = client.get("/api/likes/counts", params={"post_ids": ",".join(map(str, range(101)))})
+    assert response.status_code == 400
+
+
+def test_counters_follow_likes_and_favorites(client, auth_headers, test_post, db_session):
+    """Тест: счетчики в posts меняются вместе с лайками и избранным"""
+    if not auth_headers:
+        pytest.skip("No auth token available")
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    db_session.refresh(test_post)
+    assert (test_post.likes_count, test_post.favorites_count) == (1, 1)
+    updated_at = test_post.updated_at
+
+    client.delete(f"/api/likes/{test_post.id}", headers=auth_headers)
+    client.delete(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    db_session.refresh(test_post)
+    assert (test_post.likes_count, test_post.favorites_count) == (0, 0)
+    # Лайк не считается правкой поста
+    assert test_post.updated_at == updated_at
+
+
+def test_reconcile_counters(db_session, test_user, test_post):
+    """Тест сверки счетчиков с таблицами likes и favorites"""
+    import asyncio
+    from app.commands.reconcile_counters import reconcile
+    from app.database.models import Like
+    from tests.conftest import async_engine
+
+    db_session.add(Like(user_id=test_user.id, post_id=test_post.id))
+    test_post.favorites_count = 5
+    db_session.commit()
+
+    assert asyncio.run(reconcile(async_engine, batch_size=1)) == 1
+    db_session.refresh(test_post)
+    assert (test_post.likes_count, test_post.favorites_count) == (1, 0)
+
+    assert asyncio.run(reconcile(async_engine)) == 0
+
+
+def test_bulk_like_and_unlike(client, auth_headers, db_session, test_user):
+    """Массовые лайки идемпотентны: повтор ничего не меняет, счетчики не расходятся"""
+    from app.database.models import Post
+
+    posts = [Post(author_id=test_user.id, title=f"Селедка {i}", content="Рецепт") for i in range(3)]
+    db_session.add_all(posts)
+    db_session.commit()
+    ids = [post.id for post in posts]
+
+    response = client.post("/api/likes/bulk", json={"post_ids": ids[:2] + [9999]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"changed": ids[:2], "unchanged": [9999]}
+
+    response = client.post("/api/likes/bulk", json={"post_ids": ids}, headers=auth_headers)
+    assert response.json() == {"changed": ids[2:], "unchanged": ids[:2]}
+
+    response = client.post("/api/likes/bulk-delete", json={"post_ids": [ids[0], ids[0]]}, headers=auth_headers)
+    assert response.json() == {"changed": [ids[0]], "unchanged": []}
+
+    for post in posts:
+        db_session.refresh(post)
+    assert [post.likes_count for post in posts] == [0, 1, 1]
+
+
+def test_like_is_single_insert(client, auth_headers, test_post, count_queries):
+    """Лайк - INSERT ... ON CONFLICT и обновление счетчика, без предварительных SELECT"""
+    post_id = test_post.id
+    client.get("/auth/me", headers=auth_headers)
+    with count_queries() as queries:
+        response = client.post("/api/likes/", json={"post_id": post_id}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(queries) == 2
+    assert "ON CONFLICT DO NOTHING" in queries[0]
+
+
+def test_like_buffer_write_behind(client, auth_headers, admin_headers, test_post, db_session, monkeypatch):
+    """Отложенная запись: лайк сразу виден в чтении, в базу попадает пачкой"""
+    from tests.conftest import AsyncTestingSessionLocal
+    from app.database.like_buffer import like_buffer
+
+    monkeypatch.setattr(like_buffer, "enabled", True)
+    monkeypatch.setattr(like_buffer, "session_factory", AsyncTestingSessionLocal)
+
+    response = client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["post_id"] == test_post.id and response.json()["id"] is None
+    assert client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers).status_code == 400
+    assert client.post("/api/likes/", json={"post_id": 9999}, headers=auth_headers).status_code == 404
+
+    # В базе еще ничего, чтение видит отложенный лайк
+    db_session.refresh(test_post)
+    assert test_post.likes_count == 0
+    post = client.get(f"/api/posts/{test_post.id}", headers=auth_headers).json()
+    assert (post["likes_count"], post["liked_by_me"]) == (1, True)
+    assert client.get(f"/api/likes/post/{test_post.id}/count").json()["likes_count"] == 1
+
+    # Остановка приложения дописывает очередь
+    client.portal.call(like_buffer.stop)
+    assert like_buffer.pending == 0
+    db_session.refresh(test_post)
+    assert test_post.likes_count == 1
+
+    # Лайк и анлайк до записи гасят друг друга
+    client.delete(f"/api/likes/{test_post.id}", headers=auth_headers)
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    assert client.get(f"/api/posts/{test_post.id}").json()["likes_count"] == 1
+    assert client.portal.call(like_buffer.flush) == 0
+    assert "like_buffer_pending 0" in client.get("/metrics", headers=admin_headers).text
+
+    client.delete(f"/api/likes/{test_post.id}", headers=auth_headers)
+    assert client.portal.call(like_buffer.flush) == 1
+    db_session.refresh(test_post)
+    assert test_post.likes_count == 0
+
+
+def test_like_buffer_validators_and_bulk(client, auth_headers, test_post, db_session, monkeypatch):
+    """С буфером ETag учитывает отложенные лайки, а пакетные лайки идут через очередь"""
+    from tests.conftest import AsyncTestingSessionLocal
+    from app.database.like_buffer import like_buffer
+
+    monkeypatch.setattr(like_buffer, "enabled", True)
+    monkeypatch.setattr(like_buffer, "session_factory", AsyncTestingSessionLocal)
+
+    etags = {url: client.get(url, headers=auth_headers).headers["ETag"]
+             for url in ("/api/posts/", f"/api/posts/{test_post.id}", f"/api/posts/{test_post.id}/view")}
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    for url, etag in etags.items():
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200, url
+
+    # Лайк уже в очереди: пакетный лайк его не дублирует, пакетное снятие отменяет
+    result = client.post("/api/likes/bulk", json={"post_ids": [test_post.id, 9999]}, headers=auth_headers).json()
+    assert result == {"changed": [], "unchanged": [test_post.id, 9999]}
+    result = client.post("/api/likes/bulk-delete", json={"post_ids": [test_post.id]}, headers=auth_headers).json()
+    assert result == {"changed": [test_post.id], "unchanged": []}
+    assert client.portal.call(like_buffer.flush) == 0
+    db_session.refresh(test_post)
+    assert test_post.likes_count == 0
+
+
+def test_like_buffer_totals_and_export(client, auth_headers, admin_headers, test_post, monkeypatch):
+    """Главная, итоги автора и выгрузка видят отложенные лайки"""
+    from tests.conftest import AsyncTestingSessionLocal
+    from app.database.like_buffer import like_buffer
+
+    monkeypatch.setattr(like_buffer, "enabled", True)
+    monkeypatch.setattr(like_buffer, "session_factory", AsyncTestingSessionLocal)
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    assert like_buffer.pending == 1
+
+    assert f'id="likes-{test_post.id}">1<' in client.get("/").text
+    assert client.get(f"/api/users/{test_post.author_id}/posts").json()["likes_count"] == 1
+    line = client.get("/api/export/posts", headers=admin_headers).text.splitlines()[0]
+    assert '"likes_count":1' in line
+    assert client.portal.call(like_buffer.flush) == 1
+
+
+def test_like_buffer_survives_deleted_user(client, db_session, admin_user, admin_headers, make_posts, monkeypatch):
+    """Отложенные лайки удаленного пользователя не ломают запись очереди"""
+    from tests.conftest import AsyncTestingSessionLocal
+    from app.core.security import create_access_token
+    from app.database.like_buffer import like_buffer
+    from app.database.models import User
+
+    monkeypatch.setattr(like_buffer, "enabled", True)
+    monkeypatch.setattr(like_buffer, "session_factory", AsyncTestingSessionLocal)
+
+    readers = [User(email=f"reader{i}@example.com", login=f"reader{i}", hashed_password="x") for i in range(2)]
+    db_session.add_all(readers)
+    db_session.commit()
+    post, = make_posts(admin_user, 1)
+
+    for reader in readers:
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(reader.id)})}"}
+        assert client.post("/api/likes/", json={"post_id": post.id}, headers=headers).status_code == 200
+    assert client.get(f"/api/likes/post/{post.id}/count").json()["likes_count"] == 2
+
+    # Через API: намерения пользователя убираются сразу
+    assert client.delete(f"/api/users/{readers[0].id}", headers=admin_headers).status_code == 200
+    assert like_buffer.pending == 1
+    assert client.get(f"/api/likes/post/{post.id}/count").json()["likes_count"] == 1
+
+    # В обход API: запись пропускает строки несуществующего пользователя
+    db_session.delete(readers[1])
+    db_session.commit()
+    assert client.portal.call(like_buffer.flush) == 0
+    assert like_buffer.pending == 0
+    db_session.refresh(post)
+    assert post.likes_count == 0
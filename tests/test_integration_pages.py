@@ -0,0 +1,115 @@
+def test_home_page_is_paginated(client, test_user, make_posts):
+    """Главная рендерит одну страницу и ссылку на следующую"""
+    make_posts(test_user, 5)
+
+    response = client.get("/", params={"per_page": 2})
+    assert response.status_code == 200
+    assert response.text.count('class="post"') == 2
+    assert "load-more" in response.text
+
+    # Фрагмент для бесконечной прокрутки - только карточки
+    seen = 2
+    next_page = client.get("/", params={"per_page": 2, "fragment": 1})
+    assert "<html" not in next_page.text
+    while 'class="btn btn-secondary load-more"' in next_page.text:
+        href = next_page.text.split('load-more" ')[0].split('href="')[-1].split('"')[0]
+        next_page = client.get(href.replace("&amp;", "&"), params={"fragment": 1})
+        seen += next_page.text.count('class="post"')
+        assert "<html" not in next_page.text
+    assert seen == 5
+
+
+def test_home_page_caps_rows_and_truncates(client, test_user, make_posts):
+    """Жесткий предел строк на рендер и превью вместо полного текста"""
+    from app.routes.templates import MAX_PAGE_SIZE
+
+    make_posts(test_user, MAX_PAGE_SIZE + 1, content="селедка " * 100 + "КОНЕЦ")
+
+    response = client.get("/", params={"per_page": 1000})
+    assert response.text.count('class="post"') == MAX_PAGE_SIZE
+    assert "КОНЕЦ" not in response.text
+
+
+def test_search_page_is_paginated(client, test_user, make_posts):
+    """Страница поиска разбита на страницы и показывает сниппеты"""
+    make_posts(test_user, 3)
+
+    first = client.get("/search", params={"q": "селедки", "per_page": 2})
+    second = client.get("/search", params={"q": "селедки", "per_page": 2, "page": 2})
+
+    assert first.text.count('class="post"') == 2
+    assert "page=2" in first.text
+    assert second.text.count('class="post"') == 1
+    assert "<mark>" in first.text
+
+
+def test_post_page_is_cached_until_update(client, db_session, test_user, test_post, auth_headers, admin_headers):
+    """Повторный запрос страницы отдается из кэша, правка поста его сбрасывает"""
+    hits = client.get("/cache/stats", headers=admin_headers).json()["pages"]["hits"]
+    first = client.get(f"/posts/{test_post.id}")
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get(f"/posts/{test_post.id}")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.text == first.text
+
+    client.put(f"/api/posts/{test_post.id}", json={"title": "Новая селедка"}, headers=auth_headers)
+    updated = client.get(f"/posts/{test_post.id}")
+    assert updated.headers["X-Cache"] == "MISS"
+    assert "Новая селедка" in updated.text
+
+    stats = client.get("/cache/stats", headers=admin_headers).json()["pages"]
+    assert stats["hits"] == hits + 1
+    assert stats["invalidations"] >= 1
+
+
+def test_home_page_cache_dropped_on_new_post(client, test_user, make_posts, auth_headers):
+    """Новый пост сразу виден на главной"""
+    make_posts(test_user, 1)
+    client.get("/")
+    assert client.get("/").headers["X-Cache"] == "HIT"
+
+    client.post("/api/posts/", json={"title": "Свежая селедка", "content": "текст"}, headers=auth_headers)
+    response = client.get("/")
+    assert response.headers["X-Cache"] == "MISS"
+    assert "Свежая селедка" in response.text
+
+
+def test_ttl_cache_lru_ttl_and_tags():
+    from app.core.cache import TTLCache
+
+    now = [0.0]
+    cache = TTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1, tags=["post:1"])
+    cache.set("b", 2, tags=["post:2"])
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" дольше всех не использовался
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    assert cache.invalidate("post:1") == 1
+    assert cache.get("a") is None
+
+    # Данные прочитаны до инвалидации - не сохраняем
+    version = cache.version
+    cache.invalidate("post:3")
+    cache.set("d", 4, version=version)
+    assert cache.get("d") is None
+
+    now[0] = 11
+    assert cache.get("c") is None
+
+
+def test_post_page_conditional(client, test_post, auth_headers):
+    """HTML-страница поста: 304 и из кэша, и после его сброса"""
+    from app.core.cache import page_cache
+
+    etag = client.get(f"/posts/{test_post.id}").headers["etag"]
+    assert client.get(f"/posts/{test_post.id}", headers={"If-None-Match": etag}).status_code == 304
+    page_cache.clear()
+    assert client.get(f"/posts/{test_post.id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/api/posts/{test_post.id}", json={"content": "Новый текст"}, headers=auth_headers)
+    response = client.get(f"/posts/{test_post.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Новый текст" in response.text
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 import pytest
 
 
@@ -78,6 +80,22 @@ def test_update_own_post(client, auth_headers, test_post, test_user, db_session)
     assert data["content"] == "Обновленное содержание"
 
 
+def test_update_foreign_post_forbidden(client, db_session, test_post):
+    """Тест: чужой пост редактировать нельзя"""
+    from app.database.models import User
+    from app.core.security import get_password_hash
+
+    db_session.add(User(email="other@example.com", login="other", hashed_password=get_password_hash("otherpass")))
+    db_session.commit()
+    token = client.post("/auth/login", data={"username": "other", "password": "otherpass"}).json()["access_token"]
+
+    response = client.put(f"/api/posts/{test_post.id}", json={"title": "Взлом"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+    db_session.refresh(test_post)
+    assert test_post.title == "Тестовый пост"
+
+
 def test_search_posts(client, test_post):
     """Тест поиска постов"""
     response = client.get("/api/posts/search/", params={"q": "Тестовый"})
@@ -94,4 +112,243 @@ def test_search_posts_no_results(client):
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
-    assert len(data) == 0
\ No newline at end of file
+    assert len(data) == 0
+
+def test_get_posts_cursor_pagination(client, db_session, test_user):
+    """Тест ключевой пагинации: страницы по курсору совпадают с offset"""
+    from datetime import datetime, timedelta
+    from app.database.models import Post
+
+    base = datetime(2025, 1, 1)
+    for i in range(5):
+        db_session.add(Post(author_id=test_user.id, title=f"Пост {i}", content="Текст",
+                            created_at=base + timedelta(minutes=i)))
+    db_session.commit()
+
+    seen = []
+    response = client.get("/api/posts/", params={"limit": 2})
+    while True:
+        assert response.status_code == 200
+        seen.extend(post["id"] for post in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        response = client.get("/api/posts/", params={"limit": 2, "cursor": cursor})
+
+    offset_ids = [post["id"] for post in client.get("/api/posts/", params={"limit": 10}).json()]
+    assert seen == offset_ids
+    assert len(seen) == 5
+
+
+def test_get_posts_invalid_cursor(client):
+    """Тест некорректного курсора"""
+    response = client.get("/api/posts/", params={"cursor": "мусор"})
+
+    assert response.status_code == 400
+
+
+def test_search_posts_word_forms(client, db_session, test_user):
+    """Тест поиска по словоформам с ранжированием и сниппетом"""
+    from app.database.models import Post
+
+    db_session.add_all([
+        Post(author_id=test_user.id, title="Селедка под шубой", content="Классическая селедка со свеклой"),
+        Post(author_id=test_user.id, title="Картошка", content="Подавать к селедке с луком"),
+        Post(author_id=test_user.id, title="Борщ", content="Без рыбы"),
+    ])
+    db_session.commit()
+
+    response = client.get("/api/posts/search/", params={"q": "селедки"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [post["title"] for post in data] == ["Селедка под шубой", "Картошка"]
+    assert data[0]["rank"] > data[1]["rank"]
+    assert "<mark>селедке</mark>" in data[1]["snippet"]
+
+
+def test_search_index_follows_updates(client, auth_headers):
+    """Тест: новый и удаленный пост сразу видны в поиске"""
+    if not auth_headers:
+        pytest.skip("No auth token available")
+
+    assert client.get("/api/posts/search/", params={"q": "сельдь"}).json() == []
+
+    post_id = client.post("/api/posts/", json={"title": "Сельдь <пряная>", "content": "Сельдь в масле"},
+                          headers=auth_headers).json()["id"]
+    data = client.get("/api/posts/search/", params={"q": "сельди"}).json()
+    assert [post["id"] for post in data] == [post_id]
+
+    client.delete(f"/api/posts/{post_id}", headers=auth_headers)
+    assert client.get("/api/posts/search/", params={"q": "сельдь"}).json() == []
+
+
+def test_delete_own_post(client, auth_headers, test_post):
+    """Удаление своего поста вместе с лайками и избранным"""
+    if not auth_headers:
+        pytest.skip("No auth token available")
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+
+    response = client.delete(f"/api/posts/{test_post.id}", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.get(f"/api/posts/{test_post.id}")
+    assert response.status_code == 404
+
+    response = client.get(f"/api/likes/post/{test_post.id}/count")
+    assert response.json()["likes_count"] == 0
+
+
+def test_delete_post_cascades(client, auth_headers, test_post, db_session):
+    """Удаление поста убирает его лайки и избранное"""
+    from app.database.models import Like, favorites
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+
+    response = client.delete(f"/api/posts/{test_post.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert db_session.query(Like).count() == 0
+    assert db_session.query(favorites).count() == 0
+
+    # Повторное удаление - 404, а не 500
+    assert client.delete(f"/api/posts/{test_post.id}", headers=auth_headers).status_code == 404
+
+
+def test_bulk_delete_posts(client, db_session, test_user, auth_headers, admin_headers, make_posts, monkeypatch):
+    """Массовое удаление доступно только админу и идет пачками"""
+    from app.database.models import Post
+    from app.routes import posts as posts_routes
+
+    post_ids = [post.id for post in make_posts(test_user, 7)]
+
+    assert client.post("/api/posts/bulk-delete", json={"post_ids": post_ids}, headers=auth_headers).status_code == 403
+
+    monkeypatch.setattr(posts_routes, "DELETE_BATCH_SIZE", 3)
+    response = client.post("/api/posts/bulk-delete", json={"post_ids": post_ids[:5] + [999]}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 5
+    assert db_session.query(Post).count() == 2
+
+
+def test_get_post_conditional(client, test_post, auth_headers, count_queries):
+    """ETag/Last-Modified, 304 по любому из них и новая версия после лайка"""
+    first = client.get(f"/api/posts/{test_post.id}")
+    etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+
+    with count_queries() as queries:
+        response = client.get(f"/api/posts/{test_post.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    # Сверка версии - один запрос без content
+    assert len(queries) == 1
+    assert "content" not in queries[0]
+
+    response = client.get(f"/api/posts/{test_post.id}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    response = client.get(f"/api/posts/{test_post.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["likes_count"] == 1
+    assert response.headers["etag"] != etag
+
+
+def test_get_posts_conditional(client, test_post, auth_headers):
+    etag = client.get("/api/posts/").headers["etag"]
+    assert client.get("/api/posts/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/api/posts/{test_post.id}", json={"title": "Новое"}, headers=auth_headers)
+    response = client.get("/api/posts/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "Новое"
+
+
+def test_get_posts_fields_and_excerpt(client, db_session, test_user, count_queries):
+    """fields= оставляет только нужные поля, excerpt= режет текст в SQL"""
+    from app.database.models import Post
+
+    db_session.add(Post(author_id=test_user.id, title="Длинная селедка", content="селедка " * 100))
+    db_session.commit()
+
+    response = client.get("/api/posts/", params={"fields": "id,title"})
+    assert response.status_code == 200
+    assert all(set(post) == {"id", "title"} for post in response.json())
+
+    with count_queries() as queries:
+        response = client.get("/api/posts/", params={"excerpt": 20})
+    # Полный текст не читается, только обрезанный substr
+    assert "posts.title, posts.content" not in queries[0]
+    assert "substr(posts.content" in queries[0]
+    post = response.json()[0]
+    assert "content" not in post
+    assert post["excerpt"] == ("селедка " * 100)[:20]
+    assert post["truncated"] is True
+    assert post["author_login"] == test_user.login
+
+    response = client.get("/api/posts/", params={"fields": "title,excerpt,content", "excerpt": 20})
+    assert list(response.json()[0]) == ["title", "excerpt", "content"]
+
+    # Разные представления - разные ETag
+    assert client.get("/api/posts/").headers["etag"] != response.headers["etag"]
+
+
+@pytest.mark.parametrize("params", [{"fields": "id,password"}, {"fields": "excerpt"}, {"excerpt": 0}])
+def test_get_posts_invalid_fields(client, params):
+    assert client.get("/api/posts/", params=params).status_code == 400
+
+
+def test_get_user_posts(client, db_session, test_user):
+    """Посты одного автора с курсором и итогами, чужие посты не попадают"""
+    from app.database.models import Post, User
+
+    other = User(email="other@example.com", login="other", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    base = datetime(2025, 1, 1)
+    db_session.add_all([
+        Post(author_id=test_user.id, title=f"Моя {i}", content="селедка " * 50, likes_count=i,
+             created_at=base + timedelta(minutes=i))
+        for i in range(5)
+    ] + [Post(author_id=other.id, title="Чужая", content="селедка")])
+    db_session.commit()
+
+    response = client.get(f"/api/users/{test_user.id}/posts", params={"limit": 3, "excerpt": 10})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["posts_count"] == 5
+    assert data["likes_count"] == 10
+    assert data["author_login"] == test_user.login
+    assert [post["title"] for post in data["posts"]] == ["Моя 4", "Моя 3", "Моя 2"]
+    assert "content" not in data["posts"][0]
+
+    cursor = response.headers["x-next-cursor"]
+    rest = client.get(f"/api/users/{test_user.id}/posts", params={"limit": 3, "cursor": cursor}).json()
+    assert [post["title"] for post in rest["posts"]] == ["Моя 1", "Моя 0"]
+
+    empty = client.get(f"/api/users/{other.id}/posts").json()
+    assert empty["posts_count"] == 1
+    assert client.get("/api/users/9999/posts").status_code == 404
+
+
+def test_get_post_view(client, test_post, test_user, auth_headers):
+    """Пост, автор, счетчики и отметки читателя одним ответом"""
+    anonymous = client.get(f"/api/posts/{test_post.id}/view").json()
+    assert anonymous["author"]["login"] == test_user.login
+    assert anonymous["liked_by_me"] is False
+    assert anonymous["can_edit"] is False
+
+    client.post("/api/likes/", json={"post_id": test_post.id}, headers=auth_headers)
+    client.post(f"/api/favorites/{test_post.id}", headers=auth_headers)
+    response = client.get(f"/api/posts/{test_post.id}/view", headers=auth_headers)
+    view = response.json()
+    assert view["likes_count"] == 1 and view["favorites_count"] == 1
+    assert view["liked_by_me"] is True and view["favorited_by_me"] is True
+    assert view["can_edit"] is True
+    assert client.get(f"/api/posts/{test_post.id}/view", headers={
+        **auth_headers, "If-None-Match": response.headers["etag"]
+    }).status_code == 304
+
+    assert client.get("/api/posts/9999/view").status_code == 404
@@ -0,0 +1,143 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import models
+from app.database.trending import refresh_scores
+from tests.conftest import async_engine
+
+
+@pytest.fixture
+def posts_with_events(db_session, test_user):
+    """Три поста: свежий с одним лайком, старый с тремя лайками и пост с избранным"""
+    now = datetime.utcnow()
+    readers = [models.User(email=f"reader{i}@example.com", login=f"reader{i}", hashed_password="x") for i in range(3)]
+    db_session.add_all(readers)
+    posts = [models.Post(author_id=test_user.id, title=title, content="Текст") for title in ("Свежий", "Старый", "Избранный")]
+    db_session.add_all(posts)
+    db_session.commit()
+    fresh, old, favorite = posts
+
+    db_session.add(models.Like(user_id=readers[0].id, post_id=fresh.id, created_at=now - timedelta(hours=1)))
+    # Три лайка десять дней назад при периоде полураспада 72 часа весят меньше одного свежего
+    db_session.add_all([
+        models.Like(user_id=reader.id, post_id=old.id, created_at=now - timedelta(days=10)) for reader in readers
+    ])
+    db_session.execute(models.favorites.insert().values(
+        user_id=readers[0].id, post_id=favorite.id, created_at=now - timedelta(minutes=30)
+    ))
+    db_session.commit()
+    return now, fresh.id, old.id, favorite.id
+
+
+def test_trending_empty_before_refresh(client, test_post):
+    """Тест: до первого пересчета лента пустая"""
+    response = client.get("/api/posts/trending")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_trending_orders_by_decayed_score(client, posts_with_events):
+    """Тест: избранное весит больше лайка, старые лайки затухают"""
+    now, fresh_id, old_id, favorite_id = posts_with_events
+    assert asyncio.run(refresh_scores(async_engine, now=now)) == 5
+
+    data = client.get("/api/posts/trending").json()
+    assert [post["id"] for post in data] == [favorite_id, fresh_id, old_id]
+    assert data[1]["score"] == pytest.approx(2 ** (-1 / 72), rel=1e-6)
+    assert data[2]["score"] < data[1]["score"]
+    assert data[0]["author_login"] == "testuser"
+
+
+def test_trending_refresh_is_incremental(client, db_session, posts_with_events):
+    """Тест: повторный пересчет учитывает только новые события"""
+    now, fresh_id, old_id, favorite_id = posts_with_events
+    asyncio.run(refresh_scores(async_engine, now=now))
+    assert asyncio.run(refresh_scores(async_engine, now=now)) == 0
+
+    newcomers = [models.User(email=f"new{i}@example.com", login=f"new{i}", hashed_password="x") for i in range(2)]
+    db_session.add_all(newcomers)
+    db_session.commit()
+    db_session.add_all([models.Like(user_id=user.id, post_id=old_id, created_at=now) for user in newcomers])
+    db_session.add(models.Like(user_id=newcomers[0].id, post_id=favorite_id, created_at=now))
+    db_session.commit()
+
+    # Слишком свежие события ждут следующего запуска
+    assert asyncio.run(refresh_scores(async_engine, now=now)) == 0
+    later = now + timedelta(minutes=1)
+    assert asyncio.run(refresh_scores(async_engine, now=later, batch_size=2)) == 3
+
+    data = client.get("/api/posts/trending").json()
+    assert [post["id"] for post in data] == [favorite_id, old_id, fresh_id]
+
+
+def test_trending_cursor_pagination(client, posts_with_events, count_queries):
+    """Тест: курсор по (score, id), страница - один проход по индексу"""
+    now, fresh_id, old_id, favorite_id = posts_with_events
+    asyncio.run(refresh_scores(async_engine, now=now))
+
+    with count_queries() as queries:
+        first = client.get("/api/posts/trending", params={"limit": 2})
+    assert len(queries) <= 2, queries
+    assert [post["id"] for post in first.json()] == [favorite_id, fresh_id]
+
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/api/posts/trending", params={"limit": 2, "cursor": cursor})
+    assert [post["id"] for post in second.json()] == [old_id]
+    assert "X-Next-Cursor" not in second.headers
+
+    assert client.get("/api/posts/trending", params={"cursor": "мусор"}).status_code == 400
+
+
+def test_trending_fields(client, posts_with_events):
+    """Тест: fields= работает так же, как в ленте"""
+    now, fresh_id, old_id, favorite_id = posts_with_events
+    asyncio.run(refresh_scores(async_engine, now=now))
+
+    data = client.get("/api/posts/trending", params={"fields": "id,title"}).json()
+    assert data[0] == {"id": favorite_id, "title": "Избранный"}
+
+    data = client.get("/api/posts/trending", params={"fields": "id,score"}).json()
+    assert [post["id"] for post in data] == [favorite_id, fresh_id, old_id]
+    assert set(data[0]) == {"id", "score"}
+    # score есть только в trending
+    assert client.get("/api/posts/", params={"fields": "id,score"}).status_code == 400
+
+
+def test_trending_relike_counts_once(client, db_session, posts_with_events):
+    """Тест: лайк, снятый и поставленный снова, не накручивает счет"""
+    now, fresh_id, old_id, favorite_id = posts_with_events
+    asyncio.run(refresh_scores(async_engine, now=now))
+    score = client.get("/api/posts/trending").json()[1]["score"]
+
+    reader = db_session.query(models.User).filter_by(login="reader0").one()
+    for minutes in range(1, 4):
+        db_session.query(models.Like).filter_by(user_id=reader.id, post_id=fresh_id).delete()
+        db_session.add(models.Like(user_id=reader.id, post_id=fresh_id, created_at=now + timedelta(minutes=minutes)))
+        db_session.commit()
+        assert asyncio.run(refresh_scores(async_engine, now=now + timedelta(minutes=minutes, seconds=10))) == 1
+
+    data = client.get("/api/posts/trending").json()
+    assert data[1]["id"] == fresh_id
+    assert data[1]["score"] == pytest.approx(score, rel=1e-3)
+
+
+def test_trending_favorites_with_equal_timestamps(client, db_session, posts_with_events):
+    """Тест: пачка, кончившаяся посреди одинаковых created_at, не теряет остаток"""
+    now, fresh_id, old_id, favorite_id = posts_with_events
+    moment = now - timedelta(minutes=10)
+    users = [models.User(email=f"fan{i}@example.com", login=f"fan{i}", hashed_password="x") for i in range(5)]
+    db_session.add_all(users)
+    db_session.commit()
+    db_session.execute(models.favorites.insert(), [
+        {"user_id": user.id, "post_id": old_id, "created_at": moment} for user in users
+    ])
+    db_session.commit()
+
+    # 4 лайка и 6 добавлений в избранное пачками по 2
+    assert asyncio.run(refresh_scores(async_engine, now=now, batch_size=2)) == 10
+    assert asyncio.run(refresh_scores(async_engine, now=now, batch_size=2)) == 0
+    data = client.get("/api/posts/trending").json()
+    assert data[0]["id"] == old_id
+    assert data[0]["score"] == pytest.approx(10 * 2 ** (-10 / 60 / 72) + 3 * 2 ** (-240 / 72), rel=1e-6)
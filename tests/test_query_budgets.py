@@ -0,0 +1,111 @@
+"""Бюджеты SQL-запросов на эндпоинты.
+
+Число запросов не должно зависеть от размера страницы: если тест падает,
+значит, кто-то добавил запрос на каждую строку (N+1).
+"""
+import pytest
+
+PAGE_SIZES = [3, 30]
+
+
+def warm_up_user_cache(client, headers):
+    """Первый запрос с токеном читает users, дальше пользователь берется из кэша"""
+    client.get("/auth/me", headers=headers)
+
+
+def assert_budget(queries, budget):
+    assert len(queries) <= budget, "\n\n".join(queries)
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_posts_list_budget(client, test_user, make_posts, count_queries, size):
+    """Лента: посты с авторами, лайками и избранным одним запросом"""
+    make_posts(test_user, size)
+    with count_queries() as queries:
+        response = client.get("/api/posts/", params={"limit": size})
+    assert len(response.json()) == size
+    assert_budget(queries, 1)
+    # Анониму отметки liked/favorited не считаются подзапросами
+    assert "EXISTS" not in queries[0]
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_posts_list_authenticated_budget(client, test_user, make_posts, auth_headers, count_queries, size):
+    """С токеном - тот же один запрос: пользователь берется из кэша"""
+    make_posts(test_user, size)
+    warm_up_user_cache(client, auth_headers)
+    with count_queries() as queries:
+        client.get("/api/posts/", params={"limit": size}, headers=auth_headers)
+    assert_budget(queries, 1)
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_favorites_budget(client, db_session, test_user, make_posts, auth_headers, count_queries, size):
+    from app.database.models import Post, favorites
+
+    make_posts(test_user, size)
+    db_session.execute(favorites.insert(), [
+        {"user_id": test_user.id, "post_id": post.id} for post in db_session.query(Post).all()
+    ])
+    db_session.commit()
+    warm_up_user_cache(client, auth_headers)
+    with count_queries() as queries:
+        response = client.get("/api/favorites/", params={"limit": size}, headers=auth_headers)
+    assert len(response.json()) == size
+    assert_budget(queries, 1)
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_home_page_budget(client, test_user, make_posts, count_queries, size):
+    make_posts(test_user, size)
+    with count_queries() as queries:
+        client.get("/", params={"per_page": size})
+    assert_budget(queries, 1)
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_likes_counts_budget(client, db_session, test_user, make_posts, count_queries, size):
+    from app.database.models import Post
+
+    make_posts(test_user, size)
+    post_ids = ",".join(str(post.id) for post in db_session.query(Post).all())
+    with count_queries() as queries:
+        client.get("/api/likes/counts", params={"post_ids": post_ids})
+    assert_budget(queries, 1)
+
+
+def test_single_post_budget(client, test_post, count_queries):
+    with count_queries() as queries:
+        client.get(f"/api/posts/{test_post.id}")
+    assert_budget(queries, 2)
+
+
+def test_update_post_budget(client, test_post, auth_headers, count_queries):
+    """Правка поста: пост вместе с логином автора и сам UPDATE"""
+    warm_up_user_cache(client, auth_headers)
+    with count_queries() as queries:
+        response = client.put(f"/api/posts/{test_post.id}", json={"title": "Новое"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["author_login"] == "testuser"
+    assert_budget(queries, 2)
+
+
+@pytest.mark.parametrize("size", PAGE_SIZES)
+def test_user_posts_budget(client, test_user, make_posts, count_queries, size):
+    """Профиль: итоги автора и страница его постов"""
+    user_id = test_user.id
+    make_posts(test_user, size)
+    with count_queries() as queries:
+        response = client.get(f"/api/users/{user_id}/posts", params={"limit": size})
+    assert len(response.json()["posts"]) == size
+    assert_budget(queries, 2)
+
+
+def test_post_view_budget(client, test_post, auth_headers, count_queries):
+    """Страница поста: пост, автор и отметки читателя - один запрос"""
+    post_id = test_post.id
+    warm_up_user_cache(client, auth_headers)
+    with count_queries() as queries:
+        response = client.get(f"/api/posts/{post_id}/view", headers=auth_headers)
+    assert response.status_code == 200
+    assert_budget(queries, 1)
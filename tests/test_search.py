@@ -0,0 +1,31 @@
+from app.search.memory import InvertedIndex
+from app.search.stemmer import stem
+from app.search.text import make_snippet, terms
+
+
+def test_stem_word_forms():
+    """Словоформы сводятся к одной основе"""
+    assert stem("селедка") == stem("селедки") == stem("селедкой") == stem("Селёдке")
+    assert stem("рецепты") == stem("рецептов")
+
+
+def test_make_snippet_escapes_and_marks():
+    """Сниппет экранирует HTML и подсвечивает найденные слова"""
+    snippet = make_snippet("<b>Селедка</b> с луком", set(terms("селедки")))
+
+    assert snippet == "&lt;b&gt;<mark>Селедка</mark>&lt;/b&gt; с луком"
+
+
+def test_inverted_index_ranking():
+    """Совпадение в заголовке важнее совпадения в тексте, удаление убирает из выдачи"""
+    index = InvertedIndex()
+    index.add(1, "Картошка", "К ней подают селедку")
+    index.add(2, "Селедка", "Рецепт")
+    index.add(3, "Борщ", "Свекла")
+
+    assert [post_id for post_id, _ in index.search("селедки")] == [2, 1]
+    assert index.search("селедка картошка") == index.search("картошка селедка")[:1]
+
+    index.remove(2)
+    assert [post_id for post_id, _ in index.search("селедки")] == [1]
+    assert index.search("пельмени") == []